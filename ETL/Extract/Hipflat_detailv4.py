@@ -4,6 +4,19 @@ import csv
 import json
 import validators
 import time
+from collections import namedtuple
+from columnar_sink import open_record_sink, load_processed_values, reset_records, reextracted_suffix
+from challenge import context_options, ensure_page_ready, save_storage_state
+from crawl_frontier import CrawlFrontier, drain
+from page_archive import PageArchive, replay
+from multiprocessing.util import Finalize
+
+# orjson is optional; it decodes the chart payloads several times faster
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
 
 def scrape_canvas_data(page, selector):
     print("Finding all canvas elements on the page...")
@@ -83,73 +96,36 @@ def extract_text_data(page, selector):
         print(f"Error extracting text data for selector '{selector}': {e}")
         return ""
 
-def parse_canvas_data(canvas_data):
-    parsed_data = []
+# One chart series of a canvas: the points are kept as two column lists
+# instead of one dict per (date, value) point
+CanvasSeries = namedtuple("CanvasSeries", ["canvas_index", "currencyStringFormat", "dates", "values"])
+
+def parse_canvas_series(canvas_data):
+    """Parse the data-chart-stats payloads into CanvasSeries records."""
+    series = []
     for canvas in canvas_data:
         canvas_index = canvas.get("canvas_index")
-        data_string = canvas.get("data")
         try:
-            data = json.loads(data_string)
-            for entry in data:
-                currency_format = entry.get("currencyStringFormat", "")
-                for record in entry.get("data", []):
-                    parsed_data.append({
-                        "canvas_index": canvas_index,
-                        "currencyStringFormat": currency_format,
-                        "date": record.get("date", ""),
-                        "value": record.get("value", "")
-                    })
-        except json.JSONDecodeError as e:
+            for entry in loads(canvas.get("data")):
+                points = entry.get("data", [])
+                series.append(CanvasSeries(
+                    canvas_index,
+                    entry.get("currencyStringFormat", ""),
+                    [record.get("date", "") for record in points],
+                    [record.get("value", "") for record in points]
+                ))
+        except (json.JSONDecodeError, TypeError) as e:
             print(f"Error parsing canvas data: {e}")
-    return parsed_data
-
-def save_to_csv(data, filename, fieldnames, link):
-    if data:
-        print(f"Appending data to {filename}...")
-        # Add the `link` field to the fieldnames list if not already present
-        if "link" not in fieldnames:
-            fieldnames.append("link")
-
-        try:
-            # Open the file in append mode
-            with open(filename, mode='a', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=fieldnames)
-                # Write the header only if the file is empty
-                if file.tell() == 0:
-                    writer.writeheader()
-
-                # Add the link to each record and write the data
-                for record in data:
-                    record["link"] = link  # Include the link in each record
-                    writer.writerow(record)
-
-            print(f"Data appended to {filename} successfully.")
-        except Exception as e:
-            print(f"Error appending data to {filename}: {e}")
-    else:
-        print("No data to append.")
-
-
-def save_facility_data_to_csv(data, filename):
-    if data:
-        print(f"Appending facility data to {filename}...")
-        fieldnames = set()
-        for entry in data:
-            fieldnames.update(entry.keys())
-        fieldnames = sorted(fieldnames)
+    return series
 
-        try:
-            with open(filename, mode='a', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=fieldnames)
-                if file.tell() == 0:  # If the file is empty, write the header
-                    writer.writeheader()
-                writer.writerows(data)
-            print(f"Facility data appended to {filename} successfully.")
-        except Exception as e:
-            print(f"Error appending facility data to {filename}: {e}")
-    else:
-        print("No facility data to append.")
+def count_points(series):
+    return sum(len(entry.dates) for entry in series)
 
+def series_rows(series, link):
+    """Historical rows (historical_fieldnames order) as tuples, generated lazily."""
+    for entry in series:
+        for date, value in zip(entry.dates, entry.values):
+            yield (entry.canvas_index, entry.currencyStringFormat, date, value, link)
 
 def read_urls_from_csv(csv_filename):
     urls = []
@@ -164,174 +140,489 @@ def read_urls_from_csv(csv_filename):
         print(f"Error reading URLs from CSV file: {e}")
     return urls
 
-def save_dataset(canvas_data, facility_data, link):
-    historical_data_file = "historical_data.csv"
-    facility_data_file = "Facility.csv"
-
-    # Historical Data: Canvas Data
-    historical_fieldnames = ["canvas_index", "currencyStringFormat", "date", "value", "link"]
-
+# Output files written by save_dataset
+historical_data_file = "historical_data.csv"
+facility_data_file = "Facility.csv"
+
+# Output format: "csv", or "parquet" for typed columnar files under parquet/ (needs pyarrow)
+output_format = "csv"
+
+# Historical Data: Canvas Data
+historical_fieldnames = ["canvas_index", "currencyStringFormat", "date", "value", "link"]
+
+# Facility Data: further columns (off_plan, "Features 5", ...) are added as they appear
+base_fieldnames = [
+    "condo_name", "building", "floor", "unit", "for_rent_price", "for_rent_price_per_space",
+    "for_rent_evolution", "for_sale_price", "for_sale_price_per_space", "for_sale_evolution",
+    "location", "Features 1", "Features 2", "Features 3", "Features 4",
+    "Management 1", "Management 2", "Parking and Lifts 1", "Parking and Lifts 2", "link"
+]
+
+class DatasetSinks:
+    """Open-once, buffered writers for historical_data.csv and Facility.csv (or their Parquet datasets)."""
+
+    def __init__(self, batch_size=50, fsync_every=500, historical_file=None, facility_file=None, record_suffix=""):
+        self.historical = open_record_sink(
+            output_format, "hipflat_history" + record_suffix, "hipflat",
+            historical_file or historical_data_file, historical_fieldnames, batch_size, fsync_every
+        )
+        self.facility = open_record_sink(
+            output_format, "hipflat_facility" + record_suffix, "hipflat",
+            facility_file or facility_data_file, base_fieldnames, batch_size, fsync_every, evolving=True
+        )
+
+    def checkpoint(self):
+        """Write out buffered rows and fsync them."""
+        for sink in (self.historical, self.facility):
+            sink.flush()
+            sink.checkpoint()
+
+    def close(self):
+        self.historical.close()
+        self.facility.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def save_dataset(canvas_data, facility_data, link, sinks):
+    """canvas_data is a list of CanvasSeries (see parse_canvas_series)."""
     if canvas_data:
-        print(f"Saving canvas data to {historical_data_file}...")
+        print(f"Saving {count_points(canvas_data)} canvas records to {historical_data_file}...")
         try:
-            with open(historical_data_file, mode='a', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=historical_fieldnames)
-                if file.tell() == 0:
-                    writer.writeheader()
-                for record in canvas_data:
-                    record["link"] = link
-                    writer.writerow(record)
-            print(f"Canvas data saved to {historical_data_file} successfully.")
+            for values in series_rows(canvas_data, link):
+                sinks.historical.write_values(values)
         except Exception as e:
             print(f"Error saving canvas data to {historical_data_file}: {e}")
     else:
         print("No canvas data to save.")
 
-    # Facility Data: Handle unexpected fields dynamically
-    base_fieldnames = [
-        "condo_name", "building", "floor", "unit", "for_rent_price", "for_rent_price_per_space",
-        "for_rent_evolution", "for_sale_price", "for_sale_price_per_space", "for_sale_evolution",
-        "location", "Features 1", "Features 2", "Features 3", "Features 4",
-        "Management 1", "Management 2", "Parking and Lifts 1", "Parking and Lifts 2", "link"
-    ]
-
     if facility_data:
         print(f"Saving facility data to {facility_data_file}...")
-
-        # Dynamically handle additional fields in facility_data
-        current_fieldnames = base_fieldnames.copy()
-        extra_fields = [field for field in facility_data.keys() if field not in current_fieldnames]
-        current_fieldnames.extend(extra_fields)
-
         try:
-            with open(facility_data_file, mode='a+', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=current_fieldnames)
-                # Write the header only if the file is empty
-                if file.tell() == 0:
-                    writer.writeheader()
-                facility_data["link"] = link  # Add the link to the facility data
-                writer.writerow(facility_data)
-            print(f"Facility data saved to {facility_data_file} successfully.")
+            facility_data["link"] = link  # Add the link to the facility data
+            sinks.facility.write(facility_data)
         except Exception as e:
             print(f"Error saving facility data to {facility_data_file}: {e}")
     else:
         print("No facility data to save.")
 
 
-def is_url_processed(url, facility_csv):
+def load_processed_urls(facility_csv):
+    """Load the links already saved in Facility.csv into a set, once per run."""
+    processed_urls = load_processed_values(output_format, "hipflat_facility", facility_csv, "link")
+    print(f"Loaded {len(processed_urls)} processed URLs from {facility_csv}")
+    return processed_urls
+
+def is_url_processed(url, processed_urls):
     """Check if the URL has already been processed in Facility.csv."""
+    return url in processed_urls
+
+# Selectors for the fields collected from each Hipflat project page
+canvas_selector = "canvas"
+
+list_selectors = [
+    ("section:nth-of-type(4) > div:nth-of-type(1) > ul > li", "Features"),
+    ("section:nth-of-type(4) > div:nth-of-type(2) > ul > li", "Parking and Lifts"),
+    ("section:nth-of-type(4) > div:nth-of-type(3) > ul > li", "Management")
+]
+
+xpath_selectors = [
+    ("/html/body/main/div[3]/div[3]/div[2]/div[1]/span[2]", "for_rent_price"),
+    ("/html/body/main/div[3]/div[3]/div[2]/div[1]/span[3]", "for_rent_price_per_space"),
+    ("/html/body/main/div[3]/div[3]/div[2]/div[1]/span[4]", "for_rent_evolution")
+]
+
+css_selectors = [
+    ("div.main-header > section.characteristics > div.completed > span.data", "off_plan"),
+    ("div.main-header > section.characteristics > div.floor > span.data", "floor"),
+    ("div.main-header > section.characteristics > div.buildings > span.data", "building"),
+    ("div.main-header > section.characteristics > div.units > span.data", "unit"),
+    ("div.main-header > section.title > h1", "condo_name"),
+    ("div.main-header > section.title > span.location", "location"),
+    (".market-stats__by-operation__summary__price.median", "for_sale_price"),
+    (".market-stats__by-operation__summary__price.per-area", "for_sale_price_per_space"),
+    (".market-stats__by-operation__summary__progress", "for_sale_evolution")
+]
+
+# Element that is present once a project page has really loaded (not a challenge page)
+ready_selector = "div.main-header > section.title > h1"
+
+# Browser pool settings: number of reusable pages and how many URLs each
+# page's context serves before it is replaced with a fresh one. URLs are still
+# scraped one at a time: pool_size is a rotation size (successive URLs go round
+# robin to separate contexts, each with its own cookies), not concurrency
+pool_size = 1
+pages_per_context = 50
+
+# Run settings: headless runs reuse the session saved after a manual solve;
+# with interactive off, pages blocked by a challenge are skipped instead of prompting
+headless = False
+interactive = True
+
+# Keep a DOM snapshot (page.content()) of every scraped project page in the local
+# page archive; with reextract, extract_script is replayed over the snapshots
+# offline (reextract_processes headless browsers) into the *_reextracted files
+archive_pages = False
+archive_source = "hipflat"
+reextract = False
+reextract_processes = 4
+reextract_historical_file = "historical_data_reextracted.csv"
+reextract_facility_file = "Facility_reextracted.csv"
+
+# With use_frontier, project URLs are leased from the shared crawl frontier
+# (filled by Hipflat_linkv2.py) instead of combined_links.csv; the crawl keeps
+# polling for frontier_idle_polls x frontier_idle_wait seconds while discovery runs
+use_frontier = False
+frontier_queue = "hipflat_details"
+# URLs leased at a time; their rows are fsynced once per batch before they are marked done
+frontier_batch_size = 25
+frontier_idle_polls = 3
+frontier_idle_wait = 30
+
+# Best-effort close: a crashed browser may already be gone
+def close_browser(browser):
     try:
-        with open(facility_csv, mode='r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row.get("link") == url:
-                    return True
-    except FileNotFoundError:
-        print(f"{facility_csv} not found. It will be created.")
+        browser.close()
     except Exception as e:
-        print(f"Error checking URL in {facility_csv}: {e}")
-    return False
+        print(f"Error closing browser: {e}")
+
+class BrowserPool:
+    """Long-lived Chromium with reusable pages, recycled after a page budget or a crash.
+
+    acquire() hands out the pages in turn; the pool is used by one thread, so
+    more pages spread the URLs over more contexts but do not run them in parallel.
+    """
+
+    def __init__(self, playwright, size=1, pages_per_context=50, headless=False):
+        self.playwright = playwright
+        self.size = size
+        self.pages_per_context = pages_per_context
+        self.headless = headless
+        self.browser = None
+        self.slots = []
+        self.next_slot = 0
+
+    def start(self):
+        """Launch a browser with fresh slots, replacing (and always closing) the current one."""
+        old_browser, self.browser, self.slots = self.browser, None, []
+        try:
+            print(f"Launching browser with {self.size} reusable page(s)...")
+            try:
+                browser = self.playwright.chromium.launch(headless=self.headless)
+            except Exception as e:
+                raise RuntimeError(f"Could not launch the browser: {e}") from e
+            self.browser = browser
+            try:
+                self.slots = [self.new_slot() for _ in range(self.size)]
+            except Exception as e:
+                self.browser, self.slots = None, []
+                close_browser(browser)
+                raise RuntimeError(f"Could not open pages in the new browser: {e}") from e
+        finally:
+            # The replaced browser is closed whether or not its successor came up
+            if old_browser is not None:
+                close_browser(old_browser)
+
+    def new_slot(self):
+        # Restore cookies from the last solved challenge, if any
+        context = self.browser.new_context(**context_options())
+        return {"context": context, "page": context.new_page(), "uses": 0}
+
+    def acquire(self):
+        # Relaunch everything if the browser process went away
+        if self.browser is None or not self.browser.is_connected():
+            self.start()
+        slot = self.slots[self.next_slot]
+        self.next_slot = (self.next_slot + 1) % self.size
+        if slot["page"].is_closed():
+            slot = self.recycle(slot)
+        return slot
+
+    def release(self, slot, failed=False):
+        slot["uses"] += 1
+        if failed or slot["uses"] >= self.pages_per_context:
+            self.recycle(slot)
+
+    def recycle(self, slot):
+        print("Recycling browser context...")
+        try:
+            slot["context"].close()
+        except Exception as e:
+            print(f"Error closing browser context: {e}")
+        position = self.slots.index(slot)
+        try:
+            self.slots[position] = self.new_slot()
+        except Exception as e:
+            # The browser itself is unusable: replace it (start() closes it and
+            # raises if no new browser can be launched)
+            print(f"Error creating browser context: {e}")
+            self.start()
+        return self.slots[position]
+
+    def close(self):
+        if self.browser is not None:
+            # Keep the latest cookies for the next run
+            if self.slots and self.browser.is_connected():
+                save_storage_state(self.slots[0]["context"])
+            close_browser(self.browser)
+            self.browser = None
+
+def extract_page_data(page):
+    """Collect canvas history and facility fields from a loaded project page."""
+    canvas_data = []
+    facility_data = {}
+
+    # Extract Canvas Data
+    try:
+        canvas_data_raw = scrape_canvas_data(page, canvas_selector)
+        canvas_data = parse_canvas_series(canvas_data_raw)
+    except Exception as e:
+        print(f"Error extracting canvas data: {e}")
 
-def process_url(url, url_index, total_urls):
-    facility_csv = "Facility.csv"
+    # Extract List Data
+    for selector, section in list_selectors:
+        try:
+            list_data = extract_list_data(page, selector)
+            for i, item in enumerate(list_data, start=1):
+                facility_data[f"{section} {i}"] = item
+        except Exception as e:
+            print(f"Error processing list data for selector '{selector}': {e}")
+
+    # Extract Span Data with XPath
+    for xpath_selector, section in xpath_selectors:
+        try:
+            span_data = extract_xpath_span_data(page, xpath_selector)
+            if span_data:
+                facility_data[section] = span_data[0]
+        except Exception as e:
+            print(f"Error processing data for selector '{xpath_selector}': {e}")
 
+    # Extract Span Data with CSS
+    for css_selector, section in css_selectors:
+        try:
+            span_data = extract_css_span_data(page, css_selector)
+            if span_data:
+                facility_data[section] = span_data[0]
+        except Exception as e:
+            print(f"Error processing data for selector '{css_selector}': {e}")
+
+    return canvas_data, facility_data
+
+# Collect every field in one browser round-trip instead of one call per element
+batch_extraction = True
+
+# In-page script returning canvas payloads, list items and span texts as one JSON result;
+# mirrors scrape_canvas_data, extract_list_data and the span extractors above
+extract_script = """
+({canvasSelector, listSelectors, xpathSelectors, cssSelectors}) => {
+    const text = (node) => (node.textContent || "").trim();
+    const canvas = [];
+    document.querySelectorAll(canvasSelector).forEach((element, i) => {
+        const data = element.getAttribute("data-chart-stats");
+        if (data) {
+            canvas.push({canvas_index: i + 1, data: data});
+        }
+    });
+    const lists = listSelectors.map((selector) =>
+        Array.from(document.querySelectorAll(selector), (element) => {
+            let value = text(element);
+            element.querySelectorAll("span").forEach((span) => {
+                value += " " + text(span);
+            });
+            return value;
+        })
+    );
+    const xpaths = xpathSelectors.map((xpath) => {
+        const node = document.evaluate(
+            xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+        ).singleNodeValue;
+        return node ? text(node) : null;
+    });
+    const css = cssSelectors.map((selector) => {
+        const node = document.querySelector(selector);
+        return node ? text(node) : null;
+    });
+    return {canvas, lists, xpaths, css};
+}
+"""
+
+# Argument passed to extract_script
+extract_script_arg = {
+    "canvasSelector": canvas_selector,
+    "listSelectors": [selector for selector, _ in list_selectors],
+    "xpathSelectors": [selector for selector, _ in xpath_selectors],
+    "cssSelectors": [selector for selector, _ in css_selectors]
+}
+
+def build_page_data(result):
+    """Turn the extract_script result into (canvas_data, facility_data)."""
+    canvas_data = parse_canvas_series(result["canvas"])
+    facility_data = {}
+    for (_, section), items in zip(list_selectors, result["lists"]):
+        for i, item in enumerate(items, start=1):
+            facility_data[f"{section} {i}"] = item
+    for (_, section), text in zip(xpath_selectors, result["xpaths"]):
+        if text is not None:
+            facility_data[section] = text
+    for (_, section), text in zip(css_selectors, result["css"]):
+        if text is not None:
+            facility_data[section] = text
+    return canvas_data, facility_data
+
+def extract_page_data_batch(page):
+    """Single page.evaluate version of extract_page_data; falls back to it on script errors."""
+    try:
+        return build_page_data(page.evaluate(extract_script, extract_script_arg))
+    except Exception as e:
+        print(f"Batch extraction failed, using per-field extraction: {e}")
+        return extract_page_data(page)
+
+def process_url(url, url_index, total_urls, processed_urls, pool, sinks, archive=None):
+    """Scrape one project page; returns False if it has to be retried."""
     # Skip processing if the URL is already in Facility.csv
-    if is_url_processed(url, facility_csv):
+    if is_url_processed(url, processed_urls):
         print(f"Skipping already processed URL: {url}")
-        return
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context()
-        page = context.new_page()
+        return True
 
+    slot = pool.acquire()
+    page = slot["page"]
+    failed = False
+    try:
         print(f"Processing {url_index + 1}/{total_urls}: Navigating to URL: {url}")
         page.goto(url)
 
-        # Handle CAPTCHA manually with user input
-        print("Solve the CAPTCHA manually if it appears, then press ENTER to continue.")
-        input("Press ENTER after solving the CAPTCHA...")
+        # Pause only if a challenge is shown instead of the project page
+        if not ensure_page_ready(page, ready_selector, interactive):
+            return False
 
         try:
             page.wait_for_load_state("networkidle")
         except Exception as e:
             print(f"Page load state timeout or error: {e}")
 
-        canvas_data = []
-        facility_data = {}
+        if archive is not None:
+            archive.put(url, page.content(), archive_source)
 
-        # Extract Canvas Data
-        canvas_selector = "canvas"
-        try:
-            canvas_data_raw = scrape_canvas_data(page, canvas_selector)
-            canvas_data = parse_canvas_data(canvas_data_raw)
-        except Exception as e:
-            print(f"Error extracting canvas data: {e}")
-
-        # Extract List Data
-        list_selectors = [
-            ("section:nth-of-type(4) > div:nth-of-type(1) > ul > li", "Features"),
-            ("section:nth-of-type(4) > div:nth-of-type(2) > ul > li", "Parking and Lifts"),
-            ("section:nth-of-type(4) > div:nth-of-type(3) > ul > li", "Management")
-        ]
-        for selector, section in list_selectors:
-            try:
-                list_data = extract_list_data(page, selector)
-                for i, item in enumerate(list_data, start=1):
-                    facility_data[f"{section} {i}"] = item
-            except Exception as e:
-                print(f"Error processing list data for selector '{selector}': {e}")
-
-        # Extract Span Data with XPath
-        xpath_selectors = [
-            ("/html/body/main/div[3]/div[3]/div[2]/div[1]/span[2]", "for_rent_price"),
-            ("/html/body/main/div[3]/div[3]/div[2]/div[1]/span[3]", "for_rent_price_per_space"),
-            ("/html/body/main/div[3]/div[3]/div[2]/div[1]/span[4]", "for_rent_evolution")
-        ]
-        for xpath_selector, section in xpath_selectors:
-            try:
-                span_data = extract_xpath_span_data(page, xpath_selector)
-                if span_data:
-                    facility_data[section] = span_data[0]
-            except Exception as e:
-                print(f"Error processing data for selector '{xpath_selector}': {e}")
-
-        # Extract Span Data with CSS
-        css_selectors = [
-            ("div.main-header > section.characteristics > div.completed > span.data", "off_plan"),
-            ("div.main-header > section.characteristics > div.floor > span.data", "floor"),
-            ("div.main-header > section.characteristics > div.buildings > span.data", "building"),
-            ("div.main-header > section.characteristics > div.units > span.data", "unit"),
-            ("div.main-header > section.title > h1", "condo_name"),
-            ("div.main-header > section.title > span.location", "location"),
-            (".market-stats__by-operation__summary__price.median", "for_sale_price"),
-            (".market-stats__by-operation__summary__price.per-area", "for_sale_price_per_space"),
-            (".market-stats__by-operation__summary__progress", "for_sale_evolution")
-        ]
-        for css_selector, section in css_selectors:
-            try:
-                span_data = extract_css_span_data(page, css_selector)
-                if span_data:
-                    facility_data[section] = span_data[0]
-            except Exception as e:
-                print(f"Error processing data for selector '{css_selector}': {e}")
+        if batch_extraction:
+            canvas_data, facility_data = extract_page_data_batch(page)
+        else:
+            canvas_data, facility_data = extract_page_data(page)
 
         # Save the dataset with the current URL
-        save_dataset(canvas_data, facility_data, url)
-
-        browser.close()
-
+        save_dataset(canvas_data, facility_data, url, sinks)
+        if facility_data:
+            processed_urls.add(url)
+        return bool(facility_data)
+    except Exception as e:
+        print(f"Error processing {url}: {e}")
+        failed = True
+        return False
+    finally:
+        pool.release(slot, failed)
+
+def crawl_frontier(processed_urls, pool, sinks, archive=None):
+    """Lease project URLs from the crawl frontier (filled by Hipflat_linkv2.py) until it runs dry."""
+    with CrawlFrontier() as frontier:
+        frontier.mark_done(frontier_queue, processed_urls)
+        url_index = 0
+        for batch in drain(frontier, frontier_queue, frontier_batch_size, frontier_idle_polls, frontier_idle_wait):
+            total_urls = sum(frontier.counts(frontier_queue).values())
+            saved = []
+            finished = set()
+            try:
+                for url, _ in batch:
+                    url_index += 1
+                    if not validators.url(url):
+                        print(f"Skipping invalid URL: {url}")
+                        frontier.fail(frontier_queue, url, "invalid URL")
+                    elif process_url(url, url_index - 1, total_urls, processed_urls, pool, sinks, archive):
+                        saved.append(url)
+                    else:
+                        frontier.fail(frontier_queue, url, "not scraped")
+                    finished.add(url)
+            finally:
+                # Rows must be on disk (fsynced) before their URLs are marked done;
+                # one checkpoint per batch keeps Parquet part files large
+                sinks.checkpoint()
+                for url in saved:
+                    frontier.complete(frontier_queue, url)
+                # Leases not reached (interrupted run) go straight back to the queue
+                for url, _ in batch:
+                    if url not in finished:
+                        frontier.release(frontier_queue, url)
+            print(f"Frontier '{frontier_queue}': {frontier.counts(frontier_queue)}")
+
+# Headless page of a re-extraction worker process
+replay_browser_page = None
+
+def start_replay_browser():
+    """Worker initializer: one offline headless browser per process."""
+    global replay_browser_page
+    playwright = sync_playwright().start()
+    browser = playwright.chromium.launch(headless=True)
+    # Snapshots are rendered without their own scripts or any network access
+    context = browser.new_context(java_script_enabled=False)
+    context.route("**/*", lambda route: route.abort())
+    replay_browser_page = context.new_page()
+    Finalize(None, playwright.stop, exitpriority=10)
+    Finalize(None, browser.close, exitpriority=20)
+
+def extract_archived_page(content):
+    """Run extract_script over an archived DOM snapshot (in a worker process)."""
+    replay_browser_page.set_content(content.decode("utf-8"))
+    return build_page_data(replay_browser_page.evaluate(extract_script, extract_script_arg))
+
+def reextract_from_archive():
+    # Each run rebuilds the re-extracted outputs instead of appending to them
+    reset_records(output_format, "hipflat_history" + reextracted_suffix, reextract_historical_file)
+    reset_records(output_format, "hipflat_facility" + reextracted_suffix, reextract_facility_file)
+
+    saved = 0
+    with PageArchive() as archive, \
+            DatasetSinks(historical_file=reextract_historical_file, facility_file=reextract_facility_file,
+                         record_suffix=reextracted_suffix) as sinks:
+        for url, page_data in replay(archive, archive_source, extract_archived_page,
+                                     reextract_processes, chunksize=4, initializer=start_replay_browser):
+            if page_data is None:
+                continue
+            canvas_data, facility_data = page_data
+            save_dataset(canvas_data, facility_data, url, sinks)
+            saved += 1
+    print(f"Re-extracted {saved} project pages to {reextract_historical_file} and {reextract_facility_file}.")
 
 def main():
+    if reextract:
+        reextract_from_archive()
+        return
+
     csv_filename = "combined_links.csv"
-    urls = read_urls_from_csv(csv_filename)
-    total_urls = len(urls)
+    processed_urls = load_processed_urls(facility_data_file)
 
-    for url_index, url in enumerate(urls):
-        if validators.url(url):
-            process_url(url, url_index, total_urls)
-        else:
-            print(f"Skipping invalid URL: {url}")
+    with sync_playwright() as p, DatasetSinks() as sinks:
+        pool = BrowserPool(p, size=pool_size, pages_per_context=pages_per_context, headless=headless)
+        # One archive connection for the whole run
+        archive = PageArchive() if archive_pages else None
+        try:
+            if use_frontier:
+                crawl_frontier(processed_urls, pool, sinks, archive)
+                return
+
+            urls = read_urls_from_csv(csv_filename)
+            total_urls = len(urls)
+            for url_index, url in enumerate(urls):
+                if validators.url(url):
+                    process_url(url, url_index, total_urls, processed_urls, pool, sinks, archive)
+                else:
+                    print(f"Skipping invalid URL: {url}")
+        except KeyboardInterrupt:
+            print("\nCrawl interrupted. Buffered rows are written before exiting.")
+        finally:
+            pool.close()
+            if archive is not None:
+                archive.close()
 
 if __name__ == "__main__":
     main()
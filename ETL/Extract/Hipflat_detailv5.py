@@ -0,0 +1,200 @@
+from playwright.async_api import async_playwright
+import asyncio
+import validators
+from Hipflat_detailv4 import (
+    canvas_selector, list_selectors, xpath_selectors, css_selectors, ready_selector,
+    batch_extraction, extract_script, extract_script_arg, build_page_data,
+    parse_canvas_series, read_urls_from_csv, save_dataset, DatasetSinks, facility_data_file,
+    load_processed_urls, is_url_processed
+)
+from challenge import context_options, ensure_page_ready_async, save_storage_state_async
+
+# Number of browser tabs crawling at the same time, and how many URLs a
+# tab serves before it is replaced with a fresh one
+concurrency = 4
+pages_per_tab = 50
+
+# Tabs share one context, so a single solved challenge unlocks all of them;
+# headless runs reuse the session saved after a manual solve
+headless = False
+interactive = True
+
+async def scrape_canvas_data(page, selector):
+    canvas_elements = await page.query_selector_all(selector)
+    if not canvas_elements:
+        print("No canvas elements found.")
+        return []
+    canvas_data_list = []
+    for i, canvas in enumerate(canvas_elements, start=1):
+        canvas_data = await canvas.get_attribute('data-chart-stats')
+        if canvas_data:
+            canvas_data_list.append({"canvas_index": i, "data": canvas_data})
+    return canvas_data_list
+
+async def extract_list_data(page, css_selector):
+    try:
+        elements = await page.query_selector_all(css_selector)
+        data = []
+        for element in elements:
+            text = (await element.text_content()).strip()
+            # Check for nested span elements and append their text content if they exist
+            for span in await element.query_selector_all('span'):
+                text += ' ' + (await span.text_content()).strip()
+            data.append(text)
+        return data
+    except Exception as e:
+        print(f"Error extracting list data for selector '{css_selector}': {e}")
+        return []
+
+async def extract_first_text(page, selector):
+    try:
+        element = await page.query_selector(selector)
+        if element:
+            return (await element.text_content()).strip()
+    except Exception as e:
+        print(f"Error extracting span data for selector '{selector}': {e}")
+    return None
+
+async def extract_page_data(page):
+    """Async counterpart of Hipflat_detailv4.extract_page_data."""
+    canvas_data = []
+    facility_data = {}
+
+    try:
+        canvas_data = parse_canvas_series(await scrape_canvas_data(page, canvas_selector))
+    except Exception as e:
+        print(f"Error extracting canvas data: {e}")
+
+    for selector, section in list_selectors:
+        for i, item in enumerate(await extract_list_data(page, selector), start=1):
+            facility_data[f"{section} {i}"] = item
+
+    for xpath_selector, section in xpath_selectors:
+        text = await extract_first_text(page, f"xpath={xpath_selector}")
+        if text is not None:
+            facility_data[section] = text
+
+    for css_selector, section in css_selectors:
+        text = await extract_first_text(page, css_selector)
+        if text is not None:
+            facility_data[section] = text
+
+    return canvas_data, facility_data
+
+async def extract_page_data_batch(page):
+    """Single page.evaluate version of extract_page_data; falls back to it on script errors."""
+    try:
+        return build_page_data(await page.evaluate(extract_script, extract_script_arg))
+    except Exception as e:
+        print(f"Batch extraction failed, using per-field extraction: {e}")
+        return await extract_page_data(page)
+
+async def close_tab(worker_id, page):
+    try:
+        await page.close()
+    except Exception as e:
+        print(f"[tab {worker_id}] Error closing tab: {e}")
+
+async def replace_tab(worker_id, context, page):
+    """Close a tab and open a fresh one; a context that cannot open tabs ends the worker."""
+    await close_tab(worker_id, page)
+    try:
+        return await context.new_page()
+    except Exception as e:
+        raise RuntimeError(f"[tab {worker_id}] Could not open a new tab: {e}") from e
+
+async def worker(worker_id, context, queue, total_urls, processed_urls, prompt_lock, sinks):
+    page = await context.new_page()
+    uses = 0
+    try:
+        while True:
+            url_index, url = await queue.get()
+            try:
+                print(f"[tab {worker_id}] Processing {url_index + 1}/{total_urls}: {url}")
+                await page.goto(url)
+
+                # Pause only if a challenge is shown instead of the project page
+                if await ensure_page_ready_async(page, ready_selector, interactive, prompt_lock=prompt_lock):
+                    try:
+                        await page.wait_for_load_state("networkidle")
+                    except Exception as e:
+                        print(f"Page load state timeout or error: {e}")
+
+                    if batch_extraction:
+                        canvas_data, facility_data = await extract_page_data_batch(page)
+                    else:
+                        canvas_data, facility_data = await extract_page_data(page)
+
+                    # File writes are synchronous, so rows from different tabs never interleave
+                    save_dataset(canvas_data, facility_data, url, sinks)
+                    if facility_data:
+                        processed_urls.add(url)
+                uses += 1
+            except Exception as e:
+                print(f"[tab {worker_id}] Error processing {url}: {e}")
+                uses = pages_per_tab
+            finally:
+                queue.task_done()
+
+            # Replace the tab after its page budget or after a failure
+            if uses >= pages_per_tab:
+                page = await replace_tab(worker_id, context, page)
+                uses = 0
+    finally:
+        if page is not None:
+            await close_tab(worker_id, page)
+
+async def crawl(urls, processed_urls, sinks):
+    queue = asyncio.Queue()
+    total_urls = len(urls)
+    for url_index, url in enumerate(urls):
+        if not validators.url(url):
+            print(f"Skipping invalid URL: {url}")
+        elif is_url_processed(url, processed_urls):
+            print(f"Skipping already processed URL: {url}")
+        else:
+            queue.put_nowait((url_index, url))
+    print(f"Queued {queue.qsize()} URLs for {concurrency} tabs")
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        context = await browser.new_context(**context_options())
+        prompt_lock = asyncio.Lock()
+        workers = [
+            asyncio.create_task(worker(i + 1, context, queue, total_urls, processed_urls, prompt_lock, sinks))
+            for i in range(concurrency)
+        ]
+        join = asyncio.create_task(queue.join())
+        try:
+            # Workers only return by failing; stop when none is left to drain the queue
+            running = set(workers)
+            while not join.done():
+                done, _ = await asyncio.wait({join, *running}, return_when=asyncio.FIRST_COMPLETED)
+                for task in done - {join}:
+                    running.discard(task)
+                    print(f"A tab worker stopped: {task.exception()!r}")
+                if not running and not join.done():
+                    raise RuntimeError(f"Every tab failed; {queue.qsize()} URLs were not crawled")
+        finally:
+            join.cancel()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Keep the latest cookies for the next run
+            await save_storage_state_async(context)
+            await browser.close()
+
+def main():
+    csv_filename = "combined_links.csv"
+    urls = read_urls_from_csv(csv_filename)
+    processed_urls = load_processed_urls(facility_data_file)
+    try:
+        with DatasetSinks() as sinks:
+            asyncio.run(crawl(urls, processed_urls, sinks))
+    except KeyboardInterrupt:
+        print("\nCrawl interrupted. Data saved up to the last completed page.")
+    except RuntimeError as e:
+        print(f"Crawl stopped: {e}. Data saved up to the last completed page.")
+
+if __name__ == "__main__":
+    main()
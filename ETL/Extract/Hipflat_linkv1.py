@@ -1,5 +1,6 @@
 from playwright.sync_api import sync_playwright
 import csv
+from challenge import context_options, ensure_page_ready, save_storage_state
 
 def extract_links(page, base_xpath):
     links = []
@@ -27,21 +28,29 @@ def save_links_to_csv(links, filename):
     else:
         print("No links to save.")
 
+# Headless runs reuse the session saved after a manual solve; with interactive
+# off, a page blocked by a challenge is skipped instead of prompting
+headless = False
+interactive = True
+
 def main():
     url = "https://www.hipflat.co.th/en/thailand-projects/condo/bangkok-bm"
     base_xpath = "/html/body/main/div[3]/div//a"
     csv_filename = "link.csv"
+    links = []
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context()
+        browser = p.chromium.launch(headless=headless)
+        context = browser.new_context(**context_options())
         page = context.new_page()
 
         print(f"Navigating to URL: {url}")
         page.goto(url)
 
-        print("Solve the CAPTCHA manually if it appears, then press ENTER to continue.")
-        input("Press ENTER after solving CAPTCHA...")
+        # Pause only if a challenge is shown instead of the listing page
+        if not ensure_page_ready(page, f"xpath={base_xpath}", interactive):
+            browser.close()
+            return
 
         try:
             page.wait_for_load_state("networkidle")
@@ -54,6 +63,7 @@ def main():
         except Exception as e:
             print(f"Error extracting links: {e}")
 
+        save_storage_state(context)
         browser.close()
 
     save_links_to_csv(links, csv_filename)
@@ -1,5 +1,8 @@
 from playwright.sync_api import sync_playwright
 import csv
+from challenge import context_options, ensure_page_ready, save_storage_state
+from crawl_frontier import CrawlFrontier
+from urllib.parse import urljoin
 import signal
 import sys
 
@@ -30,12 +33,23 @@ def save_links_to_csv(links, filename, mode="w"):
     else:
         print("No links to save.")
 
+# Headless runs reuse the session saved after a manual solve; with interactive
+# off, pages blocked by a challenge are skipped instead of prompting
+headless = False
+interactive = True
+
+# Also queue the project links in the shared crawl frontier, so
+# Hipflat_detailv4.py (with use_frontier) can fetch them while this runs
+use_frontier = False
+frontier_queue = "hipflat_details"
+
 def main():
     base_url = "https://www.hipflat.co.th/en/thailand-projects/condo/bangkok-bm?page="
     base_xpath = "/html/body/main/div[3]/div//a"
     csv_filename = "links.csv"
 
     links = []
+    frontier = CrawlFrontier() if use_frontier else None
 
     def handle_interrupt(sig, frame):
         print("\nInterrupt received, saving accumulated data...")
@@ -46,8 +60,8 @@ def main():
 
     try:
         with sync_playwright() as p:
-            browser = p.chromium.launch(headless=False)
-            context = browser.new_context()
+            browser = p.chromium.launch(headless=headless)
+            context = browser.new_context(**context_options())
             page = context.new_page()
 
             for i in range(1, 51):  # Loop from page 1 to 50
@@ -55,8 +69,9 @@ def main():
                 print(f"Navigating to URL: {url}")
                 page.goto(url)
 
-                print("Solve the CAPTCHA manually if it appears, then press ENTER to continue.")
-                input("Press ENTER after solving CAPTCHA...")
+                # Pause only if a challenge is shown instead of the listing page
+                if not ensure_page_ready(page, f"xpath={base_xpath}", interactive):
+                    continue
 
                 try:
                     page.wait_for_load_state("networkidle")
@@ -70,12 +85,19 @@ def main():
 
                     # Save links incrementally after each page
                     save_links_to_csv(page_links, csv_filename, mode="a")
+                    if frontier is not None:
+                        added = frontier.enqueue_many(frontier_queue, ((urljoin(url, link), None) for link in page_links))
+                        print(f"Queued {added} new links in the crawl frontier")
                 except Exception as e:
                     print(f"Error extracting links on page {i}: {e}")
 
+            save_storage_state(context)
             browser.close()
     except Exception as e:
         print(f"An error occurred: {e}")
+    finally:
+        if frontier is not None:
+            frontier.close()
 
     # Save any remaining links after loop ends
     save_links_to_csv(links, csv_filename, mode="a")
@@ -0,0 +1,140 @@
+import argparse
+import glob
+import html
+import os
+import random
+import time
+from listing_parsers import available_parsers, get_parser
+
+# Search result pages to benchmark on: saved livinginsider pages, or the
+# synthetic pages written by --generate (see synthetic_page)
+fixture_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "search_pages")
+
+districts = ["Khlong Toei", "Watthana", "Bang Rak", "Sathon", "Huai Khwang", "Chatuchak", "Phaya Thai"]
+
+def synthetic_listing(rng, number):
+    """One result card with the layout the selectors in listing_parsers.py expect."""
+    district = rng.choice(districts)
+    title = html.escape(f"Condo for rent near BTS {district} {number} & pool <{rng.randint(1, 60)} sqm>")
+    return f"""
+      <div class="col-md-3 col-sm-4 col-xs-12">
+        <div class="istock-list">
+          <a href="/livingdetail/{700000 + number}/condo-for-rent-{number}.html">
+            <p class="istock-title">  {title}  </p>
+          </a>
+          <div class="t-16 istock-price"> {rng.randrange(8000, 90000, 500):,} THB/month </div>
+          <div class="row">
+            <div class="col-xs-12 istock-location"><i class="fa fa-map-marker"></i> <span>{district}, Bangkok</span></div>
+          </div>
+          <div class="row istock-detail">
+            <div class="col-xs-6"> {rng.randint(22, 140)} sq.m. </div>
+            <div class="col-md-5 col-xs-6"><span>Floor</span></div>
+            <div class="col-xs-6"><span>{rng.randint(1, 4)}</span> Bedroom</div>
+            <div class="col-xs-6"><span>{rng.randint(1, 3)}</span> Bathroom</div>
+          </div>
+          <div class="row">
+            <div class="col-md-5">Updated {rng.randint(1, 28)} days ago</div>
+            <div class="col-md-5"> Floor {rng.randint(1, 45)} </div>
+          </div>
+          <div class="istock-view"> {rng.randint(0, 5000)} </div>
+        </div>
+      </div>"""
+
+def synthetic_page(rng, listings=40):
+    """A search page: header, navigation, then the result grid (an ad card first, as on the site)."""
+    cards = "".join(synthetic_listing(rng, rng.randint(1, 99999)) for _ in range(listings))
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Condo for rent - livinginsider</title></head>
+<body>
+  <div class="header"><a href="/">livinginsider</a></div>
+  <div class="navbar"><ul><li>Rent</li><li>Sale</li></ul></div>
+  <div class="container">
+    <div class="col-md-3 col-sm-4 advert"><p>Advertisement</p></div>{cards}
+  </div>
+  <div class="footer"><!-- footer --></div>
+</body>
+</html>
+"""
+
+def generate_fixtures(directory, pages, seed=0):
+    """Write synthetic search pages (deterministic for a given seed)."""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    for number in range(1, pages + 1):
+        path = os.path.join(directory, f"synthetic_page_{number:02d}.html")
+        with open(path, mode='w', encoding='utf-8') as file:
+            file.write(synthetic_page(rng))
+        print(f"Wrote {path}")
+
+def load_fixtures(paths):
+    """Text of every .html file in the given files/directories."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.html"))))
+        else:
+            files.append(path)
+    pages = []
+    for file in files:
+        with open(file, encoding="utf-8", errors="replace") as handle:
+            pages.append(handle.read())
+    return files, pages
+
+def run(parser, pages):
+    results = []
+    for page in pages:
+        try:
+            results.append(parser.extract(parser.parse(page)))
+        except Exception as e:
+            results.append(e)
+    return results
+
+def bench(name, pages, repeat):
+    """Best-of-repeat timing of parse + extract over all pages: (pages/sec, results)."""
+    parser = get_parser(name)
+    results = run(parser, pages)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(parser, pages)
+        best = min(best, time.perf_counter() - start)
+    return len(pages) / best if best else float("inf"), results
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Compare the scraperV1 parser backends on saved search pages.")
+    arg_parser.add_argument("paths", nargs="*", default=[fixture_dir], help=".html files or directories of them")
+    arg_parser.add_argument("--backends", nargs="+", default=available_parsers(), help="Backends to compare")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="Timed runs per backend (best is reported)")
+    arg_parser.add_argument("--generate", type=int, default=0, metavar="PAGES",
+                            help="first write this many synthetic pages into the first path")
+    args = arg_parser.parse_args()
+
+    if args.generate:
+        generate_fixtures(args.paths[0], args.generate)
+
+    files, pages = load_fixtures(args.paths)
+    if not pages:
+        arg_parser.error(f"No .html fixtures found in {args.paths}")
+    print(f"{len(pages)} pages, best of {args.repeat} runs")
+
+    reference = None
+    for name in args.backends:
+        pages_per_second, results = bench(name, pages, args.repeat)
+        listings = sum(len(result) for result in results if isinstance(result, list))
+        errors = sum(isinstance(result, Exception) for result in results)
+        # Every backend should extract exactly what the first one (bs4 by default) does
+        if reference is None:
+            reference, mismatches = results, 0
+        else:
+            mismatches = sum(
+                str(result) != str(expected) for result, expected in zip(results, reference)
+            )
+        print(f"{name:>10}: {pages_per_second:9.1f} pages/sec  {1000 / pages_per_second:8.2f} ms/page  "
+              f"{listings} listings  {errors} errors  {mismatches} mismatching pages")
+        for file, result, expected in zip(files, results, reference):
+            if str(result) != str(expected):
+                print(f"            differs on {file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import asyncio
+import os
+
+# Cookies and local storage saved after a challenge is solved, so later
+# contexts (and later headless runs) reuse the cleared session
+storage_state_file = "hipflat_state.json"
+
+# Markers of an anti-bot interstitial instead of the requested page
+challenge_titles = ["just a moment", "attention required", "access denied", "verify you are human"]
+challenge_selectors = [
+    "iframe[src*='challenges.cloudflare.com']",
+    "#challenge-form",
+    "#challenge-running",
+    "iframe[src*='recaptcha']",
+    "iframe[src*='hcaptcha']",
+    "div.g-recaptcha"
+]
+
+# How long to wait for the expected content before checking for a challenge (ms)
+ready_timeout = 15000
+
+def context_options(state_file=storage_state_file):
+    """Keyword arguments for browser.new_context() that restore a saved session."""
+    if state_file and os.path.exists(state_file):
+        return {"storage_state": state_file}
+    return {}
+
+def save_storage_state(context, state_file=storage_state_file):
+    try:
+        context.storage_state(path=state_file)
+        print(f"Session state saved to {state_file}")
+    except Exception as e:
+        print(f"Error saving session state to {state_file}: {e}")
+
+def is_challenge_page(page):
+    try:
+        title = (page.title() or "").lower()
+        if any(marker in title for marker in challenge_titles):
+            return True
+        return any(page.query_selector(selector) for selector in challenge_selectors)
+    except Exception as e:
+        print(f"Error checking for a challenge page: {e}")
+        return False
+
+def ensure_page_ready(page, ready_selector, interactive=True, state_file=storage_state_file):
+    """Wait for ready_selector, pausing for a manual solve only when a challenge is shown.
+
+    Returns False when a challenge is still blocking the page, True otherwise.
+    """
+    try:
+        page.wait_for_selector(ready_selector, timeout=ready_timeout)
+        return True
+    except Exception:
+        pass
+
+    if not is_challenge_page(page):
+        print(f"Expected content '{ready_selector}' not found; continuing without it.")
+        return True
+
+    if not interactive:
+        print("Challenge detected in unattended mode; skipping this page.")
+        return False
+
+    print("Challenge detected. Solve it in the browser window, then press ENTER to continue.")
+    input("Press ENTER after solving the CAPTCHA...")
+    try:
+        page.wait_for_selector(ready_selector, timeout=ready_timeout)
+    except Exception:
+        if is_challenge_page(page):
+            print("Challenge is still present; skipping this page.")
+            return False
+    save_storage_state(page.context, state_file)
+    return True
+
+async def save_storage_state_async(context, state_file=storage_state_file):
+    try:
+        await context.storage_state(path=state_file)
+        print(f"Session state saved to {state_file}")
+    except Exception as e:
+        print(f"Error saving session state to {state_file}: {e}")
+
+async def is_challenge_page_async(page):
+    try:
+        title = (await page.title() or "").lower()
+        if any(marker in title for marker in challenge_titles):
+            return True
+        for selector in challenge_selectors:
+            if await page.query_selector(selector):
+                return True
+        return False
+    except Exception as e:
+        print(f"Error checking for a challenge page: {e}")
+        return False
+
+async def ensure_page_ready_async(page, ready_selector, interactive=True,
+                                  state_file=storage_state_file, prompt_lock=None):
+    """Async counterpart of ensure_page_ready; prompt_lock keeps one manual solve at a time."""
+    try:
+        await page.wait_for_selector(ready_selector, timeout=ready_timeout)
+        return True
+    except Exception:
+        pass
+
+    if not await is_challenge_page_async(page):
+        print(f"Expected content '{ready_selector}' not found; continuing without it.")
+        return True
+
+    if not interactive:
+        print("Challenge detected in unattended mode; skipping this page.")
+        return False
+
+    prompt_lock = prompt_lock or asyncio.Lock()
+    async with prompt_lock:
+        # Another tab may have solved the challenge while this one waited
+        await page.reload()
+        if await is_challenge_page_async(page):
+            await page.bring_to_front()
+            print("Challenge detected. Solve it in the browser window, then press ENTER to continue.")
+            await asyncio.to_thread(input, "Press ENTER after solving the CAPTCHA...")
+    try:
+        await page.wait_for_selector(ready_selector, timeout=ready_timeout)
+    except Exception:
+        if await is_challenge_page_async(page):
+            print("Challenge is still present; skipping this page.")
+            return False
+    await save_storage_state_async(page.context, state_file)
+    return True
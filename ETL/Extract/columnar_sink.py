@@ -0,0 +1,214 @@
+import json
+import os
+import shutil
+import time
+import uuid
+from collections import Counter
+from datetime import date
+from csv_sink import AppendOnlyCsvSink, SchemaEvolvingCsvSink, load_column_values
+
+# pyarrow is optional; without it the scrapers keep writing CSV
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Root of the Parquet dataset:
+# <parquet_root>/<record_type>/source=<source>/crawl_date=<YYYY-MM-DD>/part-*.parquet
+parquet_root = "parquet"
+
+# Columns that do not fit a record type's schema are kept as JSON in this column
+extra_fields_column = "extra_fields"
+
+# Rows per Parquet part file. Larger than the CSV batches: every flush is a new
+# file. Rows still buffered at a crash are re-scraped on resume, because resume
+# reads the URLs already in the dataset; frontier crawls checkpoint per batch.
+parquet_batch_size = 5000
+
+# Offline re-extractions from the page archive go to "<record_type>_reextracted"
+reextracted_suffix = "_reextracted"
+
+def record_schemas():
+    """Stable column layout per record type, shared by every run and source."""
+    string = pa.string()
+    details = [(name, string) for name in [
+        "post_title", "condo_name", "location", "price", "price_per_space",
+        "space", "floor", "bedroom", "bathroom", "link", "click"
+    ]] + [("Page", pa.int32()), ("index", pa.int32())]
+    facility = [(name, string) for name in [
+        "condo_name", "building", "floor", "unit", "for_rent_price", "for_rent_price_per_space",
+        "for_rent_evolution", "for_sale_price", "for_sale_price_per_space", "for_sale_evolution",
+        "location", "Features 1", "Features 2", "Features 3", "Features 4",
+        "Management 1", "Management 2", "Parking and Lifts 1", "Parking and Lifts 2", "link",
+        "off_plan", extra_fields_column
+    ]]
+    schemas = {
+        "livinginsider_links": [
+            ("Page", pa.int32()), ("Index", pa.int32()), ("Link", string), ("ClickNumber", string)
+        ],
+        "livinginsider_details": details,
+        "livinginsider_nearby": [
+            ("Condo_name", string), ("NearBy", string), ("Distance", string), ("link", string)
+        ],
+        "hipflat_history": [
+            ("canvas_index", pa.int32()), ("currencyStringFormat", string),
+            ("date", string), ("value", pa.float64()), ("link", string)
+        ],
+        "hipflat_facility": facility
+    }
+    # Re-extracted datasets have the layout of the live ones but are kept apart
+    schemas.update({name + reextracted_suffix: fields for name, fields in list(schemas.items())})
+    return schemas
+
+def parquet_available():
+    return pa is not None
+
+def convert_value(value, arrow_type):
+    """Value cast to the column type; raises TypeError/ValueError when it does not fit."""
+    if value is None or value == "":
+        return None
+    if pa.types.is_integer(arrow_type):
+        return int(value)
+    if pa.types.is_floating(arrow_type):
+        return float(value)
+    return str(value)
+
+# Buffered Parquet writer with the same write/flush/checkpoint/close interface as
+# the CSV sinks. Each flush writes one fsynced part file into today's partition,
+# so every flushed row is on disk. Values that do not fit their column type are
+# stored as null and counted per column.
+class ParquetSink:
+    def __init__(self, record_type, source, batch_size=None, root=None, crawl_date=None):
+        self.record_type = record_type
+        self.fields = record_schemas()[record_type]
+        self.schema = pa.schema(self.fields)
+        self.field_names = {name for name, _ in self.fields}
+        self.batch_size = batch_size or parquet_batch_size
+        self.directory = os.path.join(
+            root or parquet_root, record_type,
+            f"source={source}", f"crawl_date={crawl_date or date.today().isoformat()}"
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        self.columns = {name: [] for name, _ in self.fields}
+        self.pending = 0
+        self.invalid = Counter()
+        self.closed = False
+
+    def write(self, row):
+        self.write_values(self.row_values(row))
+
+    def row_values(self, row):
+        extra = {key: value for key, value in row.items() if key not in self.field_names}
+        if extra and extra_fields_column in self.columns:
+            row = dict(row, **{extra_fields_column: json.dumps(extra, ensure_ascii=False)})
+        return [row.get(name) for name, _ in self.fields]
+
+    def write_rows(self, rows):
+        """Append several rows as one unit: a batch flush never splits them."""
+        for row in rows:
+            self.add_values(self.row_values(row))
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def write_values(self, values):
+        """Append one row given as values in schema order; missing trailing values are null."""
+        self.add_values(values)
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def add_values(self, values):
+        values = list(values)
+        for position, (name, arrow_type) in enumerate(self.fields):
+            value = values[position] if position < len(values) else None
+            try:
+                converted = convert_value(value, arrow_type)
+            except (TypeError, ValueError):
+                converted = None
+                self.invalid[name] += 1
+                if self.invalid[name] == 1:
+                    print(f"{self.record_type}: {value!r} is not a valid {arrow_type} for '{name}'; stored as null")
+            self.columns[name].append(converted)
+        self.pending += 1
+
+    def flush(self):
+        if not self.pending:
+            return
+        table = pa.table(
+            {name: pa.array(self.columns[name], type=arrow_type) for name, arrow_type in self.fields},
+            schema=self.schema
+        )
+        part_name = f"part-{time.strftime('%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        temp_path = os.path.join(self.directory, "." + part_name)
+        with open(temp_path, mode='wb') as file:
+            pq.write_table(table, file, compression="zstd")
+            file.flush()
+            os.fsync(file.fileno())
+        # Readers never see half-written files
+        os.replace(temp_path, os.path.join(self.directory, part_name))
+        self.columns = {name: [] for name, _ in self.fields}
+        self.pending = 0
+
+    def checkpoint(self):
+        """Write out buffered rows; flushed part files are already fsynced."""
+        self.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        if self.invalid:
+            print(f"{self.record_type}: {sum(self.invalid.values())} values could not be cast and "
+                  f"were stored as null: {dict(self.invalid)}")
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def open_record_sink(output_format, record_type, source, csv_filename, fieldnames,
+                     batch_size=50, fsync_every=500, evolving=False):
+    """Return a Parquet sink when requested and available, otherwise the CSV sink."""
+    if output_format == "parquet":
+        if parquet_available():
+            # batch_size and fsync_every are CSV settings; part files use parquet_batch_size
+            return ParquetSink(record_type, source)
+        print("pyarrow is not installed; writing CSV instead of Parquet.")
+    if evolving:
+        return SchemaEvolvingCsvSink(csv_filename, fieldnames, batch_size, fsync_every)
+    return AppendOnlyCsvSink(csv_filename, fieldnames, batch_size, fsync_every)
+
+def reset_records(output_format, record_type, csv_filename):
+    """Delete what a previous run wrote for a record type, for outputs rebuilt from scratch."""
+    if output_format == "parquet" and parquet_available():
+        path = record_path(record_type)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+    elif os.path.exists(csv_filename):
+        os.remove(csv_filename)
+
+def record_path(record_type, root=None):
+    return os.path.join(root or parquet_root, record_type)
+
+def read_records(record_type, columns=None, filters=None, root=None):
+    """Load a record type as a typed pandas DataFrame, memory-mapping the part files."""
+    path = record_path(record_type, root)
+    table = pq.read_table(path, columns=columns, filters=filters, memory_map=True, partitioning="hive")
+    return table.to_pandas()
+
+def load_processed_values(output_format, record_type, csv_filename, column):
+    """Resume helper: the values of one column already written in the chosen format."""
+    if output_format == "parquet" and parquet_available():
+        path = record_path(record_type)
+        if not os.path.isdir(path):
+            return set()
+        try:
+            values = ds.dataset(path, format="parquet", partitioning="hive").to_table(columns=[column])
+            return {value for value in values.column(column).to_pylist() if value is not None}
+        except Exception as e:
+            print(f"Error reading {path}: {e}. Starting fresh.")
+            return set()
+    return load_column_values(csv_filename, column)
@@ -0,0 +1,168 @@
+import json
+import sqlite3
+import threading
+import time
+
+# Shared by the link and detail scrapers of every source
+frontier_file = "frontier.db"
+
+# A leased URL returns to the queue if it is not completed within lease_seconds
+# (e.g. the worker crashed); after max_attempts failures it is parked as failed
+default_lease_seconds = 300
+default_max_attempts = 3
+
+schema = """
+CREATE TABLE IF NOT EXISTS frontier (
+    queue TEXT NOT NULL,
+    url TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    metadata TEXT,
+    error TEXT,
+    added REAL NOT NULL,
+    PRIMARY KEY (queue, url)
+);
+CREATE INDEX IF NOT EXISTS frontier_ready ON frontier (queue, state, priority DESC, added);
+"""
+
+# Persistent crawl queue in SQLite. Link scrapers enqueue URLs (duplicates are
+# rejected by the primary key), detail scrapers lease them, and every state
+# change is committed, so discovery and detail fetching can run at the same
+# time in separate processes and resume after a crash.
+class CrawlFrontier:
+    def __init__(self, path=None, lease_seconds=None, max_attempts=None):
+        self.path = path or frontier_file
+        self.lease_seconds = lease_seconds if lease_seconds is not None else default_lease_seconds
+        self.max_attempts = max_attempts if max_attempts is not None else default_max_attempts
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(schema)
+
+    def enqueue(self, queue, url, priority=0, metadata=None):
+        """Add one URL; returns False if it was already known."""
+        return self.enqueue_many(queue, [(url, metadata)], priority) == 1
+
+    def enqueue_many(self, queue, items, priority=0):
+        """Add (url, metadata) pairs in one transaction; returns how many were new."""
+        now = time.time()
+        rows = [
+            (queue, url, priority, json.dumps(metadata) if metadata is not None else None, now)
+            for url, metadata in items
+        ]
+        return self.execute_many(
+            "INSERT OR IGNORE INTO frontier (queue, url, priority, metadata, added) VALUES (?, ?, ?, ?, ?)", rows
+        )
+
+    def mark_done(self, queue, urls):
+        """Record URLs finished outside the frontier (e.g. rows already in the output files).
+
+        Unknown URLs are added as done and known ones (pending, leased or failed)
+        are moved to done; returns how many rows changed.
+        """
+        now = time.time()
+        return self.execute_many(
+            "INSERT INTO frontier (queue, url, state, added) VALUES (?, ?, 'done', ?) "
+            "ON CONFLICT (queue, url) DO UPDATE SET state = 'done', lease_until = NULL, error = NULL "
+            "WHERE state != 'done'",
+            [(queue, url, now) for url in urls]
+        )
+
+    def execute_many(self, statement, rows):
+        """Run a statement for every row in one transaction; returns how many rows changed."""
+        with self.lock:
+            before = self.connection.total_changes
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.executemany(statement, rows)
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+            return self.connection.total_changes - before
+
+    def lease(self, queue, limit=1):
+        """Take up to `limit` ready URLs, highest priority first: [(url, metadata), ...]."""
+        now = time.time()
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.connection.execute(
+                    "SELECT url, metadata FROM frontier WHERE queue = ? AND "
+                    "(state = 'pending' OR (state = 'leased' AND lease_until < ?)) "
+                    "ORDER BY priority DESC, added LIMIT ?", (queue, now, limit)
+                ).fetchall()
+                self.connection.executemany(
+                    "UPDATE frontier SET state = 'leased', lease_until = ?, attempts = attempts + 1 "
+                    "WHERE queue = ? AND url = ?",
+                    [(now + self.lease_seconds, queue, url) for url, _ in rows]
+                )
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+        return [(url, json.loads(metadata) if metadata else {}) for url, metadata in rows]
+
+    def complete(self, queue, url):
+        self.update(
+            "UPDATE frontier SET state = 'done', lease_until = NULL, error = NULL WHERE queue = ? AND url = ?",
+            (queue, url)
+        )
+
+    def fail(self, queue, url, error=None):
+        """Return a URL to the queue, or park it as failed after max_attempts."""
+        self.update(
+            "UPDATE frontier SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "lease_until = NULL, error = ? WHERE queue = ? AND url = ?",
+            (self.max_attempts, str(error) if error is not None else None, queue, url)
+        )
+
+    def release(self, queue, url):
+        """Give back a leased URL that was not attempted (e.g. on shutdown)."""
+        self.update(
+            "UPDATE frontier SET state = 'pending', lease_until = NULL, attempts = MAX(attempts - 1, 0) "
+            "WHERE queue = ? AND url = ? AND state = 'leased'", (queue, url)
+        )
+
+    def update(self, statement, params):
+        with self.lock:
+            self.connection.execute(statement, params)
+
+    def counts(self, queue):
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT state, COUNT(*) FROM frontier WHERE queue = ? GROUP BY state", (queue,)
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def drain(frontier, queue, batch_size, idle_polls=0, idle_wait=30):
+    """Yield leased batches until the queue stays empty for idle_polls waits.
+
+    With idle_polls > 0 a detail scraper keeps polling while a link scraper is
+    still enqueueing in another process.
+    """
+    idle = 0
+    while True:
+        batch = frontier.lease(queue, batch_size)
+        if batch:
+            idle = 0
+            yield batch
+            continue
+        if idle >= idle_polls:
+            return
+        idle += 1
+        print(f"Frontier queue '{queue}' is empty; waiting {idle_wait}s for new links ({idle}/{idle_polls})")
+        time.sleep(idle_wait)
@@ -0,0 +1,219 @@
+import csv
+import os
+
+# Drop a partially written last record left behind by a crash so appends start on a clean line
+def repair_csv_tail(filename):
+    if not os.path.exists(filename):
+        return
+    with open(filename, mode='rb+') as file:
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        if size == 0:
+            return
+        file.seek(-1, os.SEEK_END)
+        if file.read(1) == b"\n":
+            return
+
+        # Walk back to the end of the last complete record
+        position = size
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            file.seek(position)
+            chunk = file.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                file.truncate(position + newline + 1)
+                print(f"Removed incomplete last record from {filename}")
+                return
+        file.truncate(0)
+
+# Read the values of a single column, e.g. the links already saved by a previous run
+def load_column_values(filename, column):
+    if not os.path.exists(filename):
+        return set()
+    try:
+        with open(filename, mode='r', newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if not header or column not in header:
+                print(f"Warning: Missing '{column}' column in {filename}. Starting fresh.")
+                return set()
+            position = header.index(column)
+            return {row[position] for row in reader if len(row) > position}
+    except Exception as e:
+        print(f"Error reading {filename}: {e}. Starting fresh.")
+        return set()
+
+# Append-only CSV writer: keeps the file open, writes rows in batches and
+# fsyncs at checkpoints so an interrupted crawl can resume from the file
+class AppendOnlyCsvSink:
+    def __init__(self, filename, fieldnames, batch_size=100, fsync_every=1000):
+        self.filename = filename
+        self.fieldnames = list(fieldnames)
+        self.batch_size = batch_size
+        self.fsync_every = fsync_every
+        self.pending = []
+        self.unsynced = 0
+
+        repair_csv_tail(filename)
+        self.file = open(filename, mode='a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        # Write the header only if the file is empty
+        if self.file.tell() == 0:
+            self.writer.writerow(self.fieldnames)
+            self.checkpoint()
+
+    def write(self, row):
+        self.write_values([row.get(field, "") for field in self.fieldnames])
+
+    def write_rows(self, rows):
+        """Append several rows as one unit: a batch flush never splits them."""
+        self.pending.extend([row.get(field, "") for field in self.fieldnames] for row in rows)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def write_values(self, values):
+        """Append one row given as values in fieldnames order (e.g. a tuple)."""
+        self.pending.append(values)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.writer.writerows(self.pending)
+            self.unsynced += len(self.pending)
+            self.pending = []
+        self.file.flush()
+        if self.unsynced >= self.fsync_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.checkpoint()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# Buffered CSV writer for records whose columns are not known up front (e.g.
+# "Features 5" appearing late in a crawl). New columns are appended to the
+# schema as they appear; at close the header is rewritten once and earlier
+# rows are padded, so every row lines up with the final header. The pending
+# schema is kept in a sidecar file so a crashed run can still be repaired.
+class SchemaEvolvingCsvSink:
+    def __init__(self, filename, fieldnames, batch_size=100, fsync_every=1000):
+        self.filename = filename
+        self.schema_file = filename + ".columns"
+        self.batch_size = batch_size
+        self.fsync_every = fsync_every
+        self.pending = []
+        self.unsynced = 0
+
+        repair_csv_tail(filename)
+        self.header = self.read_header()
+        if self.header is None:
+            self.header = list(fieldnames)
+            with open(filename, mode='w', newline='', encoding='utf-8') as file:
+                csv.writer(file).writerow(self.header)
+
+        # Columns recorded by an interrupted run come first, then any new base columns
+        self.fieldnames = list(self.header)
+        if os.path.exists(self.schema_file):
+            with open(self.schema_file, mode='r', encoding='utf-8') as file:
+                self.extend_fieldnames(line.rstrip("\n") for line in file)
+        self.extend_fieldnames(fieldnames)
+
+        self.file = open(filename, mode='a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+
+    def read_header(self):
+        if not os.path.exists(self.filename) or os.path.getsize(self.filename) == 0:
+            return None
+        with open(self.filename, mode='r', newline='', encoding='utf-8') as file:
+            return next(csv.reader(file), None)
+
+    def extend_fieldnames(self, names):
+        known = set(self.fieldnames)
+        added = [name for name in names if name and name not in known and not known.add(name)]
+        if added:
+            self.fieldnames.extend(added)
+            print(f"New columns for {self.filename}: {added}")
+            with open(self.schema_file, mode='w', encoding='utf-8') as file:
+                file.write("\n".join(self.fieldnames) + "\n")
+
+    def write(self, row):
+        self.extend_fieldnames(row.keys())
+        self.write_values([row.get(field, "") for field in self.fieldnames])
+
+    def write_rows(self, rows):
+        """Append several rows as one unit: a batch flush never splits them."""
+        for row in rows:
+            self.extend_fieldnames(row.keys())
+            self.pending.append([row.get(field, "") for field in self.fieldnames])
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def write_values(self, values):
+        """Append one row given as values in the current fieldnames order."""
+        self.pending.append(values)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.writer.writerows(self.pending)
+            self.unsynced += len(self.pending)
+            self.pending = []
+        self.file.flush()
+        if self.unsynced >= self.fsync_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def evolve_schema(self):
+        print(f"Rewriting {self.filename} with {len(self.fieldnames)} columns...")
+        width = len(self.fieldnames)
+        temp_file = self.filename + ".tmp"
+        with open(self.filename, mode='r', newline='', encoding='utf-8') as source, \
+                open(temp_file, mode='w', newline='', encoding='utf-8') as target:
+            reader = csv.reader(source)
+            writer = csv.writer(target)
+            next(reader, None)
+            writer.writerow(self.fieldnames)
+            for row in reader:
+                writer.writerow(row + [""] * (width - len(row)))
+            target.flush()
+            os.fsync(target.fileno())
+        os.replace(temp_file, self.filename)
+        self.header = list(self.fieldnames)
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.checkpoint()
+        self.file.close()
+        if self.fieldnames != self.header:
+            self.evolve_schema()
+        if os.path.exists(self.schema_file):
+            os.remove(self.schema_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
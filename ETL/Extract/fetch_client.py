@@ -0,0 +1,142 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Brotli is optional; urllib3 only decodes "br" responses when a brotli package
+# is installed, so the client advertises br only in that case
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+accept_encoding = "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+
+# Validators (ETag / Last-Modified) and compressed bodies of earlier responses
+cache_file = "http_cache.db"
+
+# Keep-alive pool: pool_maxsize should cover the number of worker threads
+pool_connections = 10
+pool_maxsize = 16
+request_timeout = 30
+
+# Retry connection errors and throttling/5xx responses with backoff; the last
+# response is returned as-is so callers keep their raise_for_status handling
+retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET", "HEAD"], raise_on_status=False)
+
+schema = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    headers TEXT,
+    encoding TEXT,
+    body BLOB,
+    fetched REAL
+)
+"""
+
+# url -> validators and the zlib-compressed body of the last 200 response
+class ValidatorStore:
+    def __init__(self, path=None):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path or cache_file, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(schema)
+        self.connection.commit()
+
+    def lookup(self, url):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT etag, last_modified, headers, encoding, body FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+
+    def save(self, url, response):
+        headers = {key: value for key, value in response.headers.items()
+                   if key.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                 json.dumps(headers), response.encoding, zlib.compress(response.content), time.time())
+            )
+
+    def delete(self, url):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM responses WHERE url = ?", (url,))
+
+    def touch(self, url):
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE responses SET fetched = ? WHERE url = ?", (time.time(), url))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+def cached_response(url, record):
+    """Rebuild a 200 response from the stored body after a 304 Not Modified."""
+    _, _, headers, encoding, body = record
+    response = requests.Response()
+    response.url = url
+    response.status_code = 200
+    response.headers.update(json.loads(headers))
+    response.encoding = encoding
+    response._content = zlib.decompress(body)
+    response.from_cache = True
+    return response
+
+# Shared HTTP client for the requests-based scrapers: one keep-alive session,
+# compressed transfers, and conditional GETs so unchanged pages cost a 304.
+# Safe to share between worker threads.
+class FetchClient:
+    def __init__(self, headers=None, cache_path=None, revalidate=True, timeout=None):
+        self.timeout = timeout if timeout is not None else request_timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept-Encoding"] = accept_encoding
+        self.session.headers.update(headers or {})
+        self.store = ValidatorStore(cache_path) if revalidate else None
+
+    def get(self, url, **kwargs):
+        record = self.store.lookup(url) if self.store else None
+        headers = dict(kwargs.pop("headers", None) or {})
+        if record:
+            etag, last_modified = record[0], record[1]
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = self.session.get(url, headers=headers, timeout=kwargs.pop("timeout", self.timeout), **kwargs)
+        if response.status_code == 304 and record:
+            self.store.touch(url)
+            return cached_response(url, record)
+
+        response.from_cache = False
+        if self.store and response.status_code == 200:
+            if "ETag" in response.headers or "Last-Modified" in response.headers:
+                self.store.save(url, response)
+            elif record:
+                # The page no longer sends validators; stop sending the outdated ones
+                self.store.delete(url)
+        return response
+
+    def close(self):
+        self.session.close()
+        if self.store:
+            self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,108 @@
+from bs4 import BeautifulSoup
+from cssselect import HTMLTranslator
+from lxml import etree, html
+
+# selectolax (Lexbor, a C HTML5 parser) is optional
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxHTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxHTMLParser
+    except ImportError:
+        SelectolaxHTMLParser = None
+
+# CSS selectors of a livinginsider search page, shared by every backend
+container_selector = "div:nth-of-type(3) div.col-md-3.col-sm-4:nth-of-type(n+2)"
+field_selectors = {
+    "title": "p",
+    "rent_price": "div.t-16",
+    "location": ".col-xs-12 span",
+    "size": "div.col-xs-6:nth-of-type(1)",
+    "click_number": "div.istock-view",
+    "floor": "div.col-md-5:nth-of-type(2)",
+    "bedroom": "div.col-xs-6:nth-of-type(3)",
+    "bathroom": "div.col-xs-6:nth-of-type(4)"
+}
+
+# Reference backend: BeautifulSoup with the pure-Python html.parser
+class SoupParser:
+    name = "bs4"
+
+    def parse(self, content):
+        return BeautifulSoup(content, "html.parser")
+
+    def extract(self, document):
+        condos = []
+        for container in document.select(container_selector):
+            condos.append({
+                key: container.select_one(selector).text.strip()
+                for key, selector in field_selectors.items()
+            })
+        return condos
+
+# lxml parser with the selectors translated to XPath and compiled once. Field
+# selectors use the descendant axis so they match inside the container only,
+# like select_one. Compiled XPath objects are not shared between threads, so
+# use one parser object per thread.
+class LxmlParser:
+    name = "lxml"
+
+    def __init__(self):
+        translator = HTMLTranslator()
+        self.containers = etree.XPath(translator.css_to_xpath(container_selector))
+        # One compiled expression per field, returning the first match only
+        self.fields = [
+            (key, etree.XPath(f"({translator.css_to_xpath(selector, prefix='descendant::')})[1]"))
+            for key, selector in field_selectors.items()
+        ]
+
+    def parse(self, content):
+        # lxml rejects an empty document (blank, or only comments); like the bs4
+        # backend it then has no listings
+        if not content or not content.strip():
+            return None
+        try:
+            return html.fromstring(content)
+        except etree.ParserError:
+            return None
+
+    def extract(self, document):
+        condos = []
+        if document is None:
+            return condos
+        for container in self.containers(document):
+            condo = {}
+            for key, field in self.fields:
+                # IndexError on a missing field, as select_one(...).text fails in the bs4 backend
+                condo[key] = field(container)[0].text_content().strip()
+            condos.append(condo)
+        return condos
+
+# selectolax: C parser and C selector engine (selectors are matched by Lexbor/Modest)
+class SelectolaxParser:
+    name = "selectolax"
+
+    def parse(self, content):
+        return SelectolaxHTMLParser(content)
+
+    def extract(self, document):
+        condos = []
+        for container in document.css(container_selector):
+            condos.append({
+                key: container.css_first(selector).text().strip()
+                for key, selector in field_selectors.items()
+            })
+        return condos
+
+parsers = {parser.name: parser for parser in (SoupParser, LxmlParser, SelectolaxParser)}
+
+def available_parsers():
+    return [name for name in parsers if name != "selectolax" or SelectolaxHTMLParser is not None]
+
+def get_parser(name):
+    """Parser backend by name: bs4, lxml or selectolax."""
+    if name not in parsers:
+        raise ValueError(f"Unknown parser backend '{name}', expected one of {list(parsers)}")
+    if name not in available_parsers():
+        raise ImportError(f"Parser backend '{name}' needs the selectolax package")
+    return parsers[name]()
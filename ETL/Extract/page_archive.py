@@ -0,0 +1,106 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from multiprocessing import Pool
+
+# Raw pages kept for offline re-extraction:
+# <archive_root>/objects/<2 hex>/<sha256>.html.gz plus <archive_root>/index.db
+archive_root = "page_archive"
+
+schema = """
+CREATE TABLE IF NOT EXISTS captures (
+    source TEXT NOT NULL,
+    url TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    sha256 TEXT NOT NULL,
+    content_type TEXT,
+    PRIMARY KEY (source, url, fetched)
+) WITHOUT ROWID
+"""
+
+def blob_path(root, digest):
+    return os.path.join(root, "objects", digest[:2], digest + ".html.gz")
+
+def read_blob(root, digest):
+    with gzip.open(blob_path(root, digest), "rb") as file:
+        return file.read()
+
+# Content-addressed, gzip-compressed page store. Identical bodies are stored
+# once; every capture (source, url, time) is recorded in a SQLite index so the
+# latest page per URL can be replayed through the extractors without fetching.
+class PageArchive:
+    def __init__(self, root=None):
+        self.root = root or archive_root
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(self.root, "index.db"), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(schema)
+        self.connection.commit()
+
+    def put(self, url, content, source, content_type="text/html", fetched=None):
+        """Store one capture; content is bytes (or str, stored as UTF-8). Returns its sha256."""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        digest = hashlib.sha256(content).hexdigest()
+        path = blob_path(self.root, digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(temp_path, "wb", compresslevel=6) as file:
+                file.write(content)
+            os.replace(temp_path, path)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO captures VALUES (?, ?, ?, ?, ?)",
+                (source, url, fetched or time.time(), digest, content_type)
+            )
+        return digest
+
+    def get(self, digest):
+        return read_blob(self.root, digest)
+
+    def latest(self, source):
+        """[(url, sha256)] of the newest capture of every URL of a source."""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT url, sha256 FROM captures AS c WHERE source = ? AND fetched = "
+                "(SELECT MAX(fetched) FROM captures WHERE source = c.source AND url = c.url) ORDER BY url",
+                (source,)
+            ).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def replay_page(task):
+    # Runs in a worker process: load one stored page and run the extractor on it
+    root, url, digest, extract = task
+    try:
+        return url, extract(read_blob(root, digest))
+    except Exception as e:
+        print(f"Error re-extracting {url}: {e}")
+        return url, None
+
+def replay(archive, source, extract, processes=None, chunksize=16, initializer=None):
+    """Yield (url, extract(content)) for the latest page of every URL, using all cores.
+
+    extract must be a module-level function (it is sent to the worker processes);
+    results come back in completion order, None when the extractor failed.
+    """
+    tasks = [(archive.root, url, digest, extract) for url, digest in archive.latest(source)]
+    print(f"Re-extracting {len(tasks)} archived pages of '{source}'")
+    with Pool(processes, initializer=initializer) as pool:
+        yield from pool.imap_unordered(replay_page, tasks, chunksize)
+        # Let the workers exit normally so their finalizers (e.g. closing a browser) run
+        pool.close()
+        pool.join()
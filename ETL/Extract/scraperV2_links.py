@@ -1,8 +1,33 @@
 import os
 import csv
-import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from columnar_sink import open_record_sink, load_processed_values
+from crawl_frontier import CrawlFrontier
+
+# Output format: "csv", or "parquet" for typed columnar files under parquet/ (needs pyarrow)
+output_format = "csv"
+
+# Also queue the listing links in the shared crawl frontier, so
+# scraperv3_detail.py (with use_frontier) can fetch them while this runs
+use_frontier = False
+frontier_queue = "livinginsider_details"
+
+# Search pages are split across this many browsers (page k goes to worker (k - 1) % page_workers);
+# 1 scrapes them one after another
+page_workers = 4
+
+# Seconds to wait for the posts of a page to render before treating it as empty
+page_timeout = 20
+
+# Extra attempts for a page that fails to load; a page that keeps failing stops the run with an error
+page_retries = 2
 
 # Define XPaths for different page structures and posts
 xpaths = {
@@ -11,12 +36,13 @@ xpaths = {
     "link_variations": [".//a"]
 }
 
-# Initialize Selenium WebDriver
-options = webdriver.ChromeOptions()
-options.add_argument("--headless")  # Run in headless mode
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-driver = webdriver.Chrome(options=options)
+# Initialize a Selenium WebDriver (one per worker; a driver must not be shared between threads)
+def make_driver():
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")  # Run in headless mode
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return webdriver.Chrome(options=options)
 
 # Function to load processed links from the CSV file
 def load_processed_links(filename):
@@ -33,45 +59,36 @@ def load_processed_links(filename):
         print(f"Error reading {filename}: {str(e)}. Starting fresh.")
         return set()
 
-# Function to save data incrementally to a CSV file
-def save_to_csv(filename, data, fieldnames):
-    file_exists = os.path.exists(filename)
-    with open(filename, "a", newline="", encoding="utf-8") as file:
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()  # Write header only if the file doesn't exist
-        writer.writerows(data)
-
-# Function to scrape a single page (links and click numbers together)
-def scrape_page_with_clicks(url, page_number, processed_links):
+# Function to collect the posts of a single page: candidate links and click number per post.
+# Links are picked later against the links saved so far (see select_links).
+def scrape_page_posts(driver, url, page_number):
     print(f"Processing page {page_number}: {url}")
     driver.get(url)
-    time.sleep(5)  # Wait for page to load
 
     # Select the correct root container based on page number
     posts_xpath = xpaths["posts_page1"] if page_number == 1 else xpaths["posts_page2"]
 
     try:
-        root = driver.find_element(By.XPATH, posts_xpath)
-        posts = root.find_elements(By.XPATH, "div")  # Collect all div children under root
-        print(f"Found {len(posts)} posts on page {page_number}")
-    except Exception as e:
-        print(f"Error finding posts: {str(e)}")
-        posts = []
+        # Wait until the container has its posts instead of sleeping a fixed time
+        WebDriverWait(driver, page_timeout).until(lambda d: d.find_elements(By.XPATH, posts_xpath + "/div"))
+    except TimeoutException:
+        # End of the listing: the page has no posts
+        print(f"No posts rendered on page {page_number} within {page_timeout}s")
+        return []
+    root = driver.find_element(By.XPATH, posts_xpath)
+    posts = root.find_elements(By.XPATH, "div")  # Collect all div children under root
+    print(f"Found {len(posts)} posts on page {page_number}")
 
-    combined_data = []
+    page_posts = []
     for index, post in enumerate(posts, start=1):
         try:
-            # Extract link
-            link = "No Link"
+            # Every .html link of the post, per link variation, in page order
+            links = []
             for link_xpath in xpaths["link_variations"]:
                 try:
                     link_elements = post.find_elements(By.XPATH, link_xpath)
-                    for link_element in link_elements:
-                        href = link_element.get_attribute("href")
-                        if href and href.endswith('.html') and href not in processed_links:
-                            link = href
-                            break
+                    hrefs = [link_element.get_attribute("href") for link_element in link_elements]
+                    links.append([href for href in hrefs if href and href.endswith('.html')])
                 except Exception:
                     continue
 
@@ -83,24 +100,119 @@ def scrape_page_with_clicks(url, page_number, processed_links):
             except Exception:
                 pass
 
-            if link not in processed_links:
-                combined_data.append({
-                    "Page": page_number,
-                    "Index": index,
-                    "Link": link,
-                    "ClickNumber": click_number
-                })
+            page_posts.append({"Index": index, "Links": links, "ClickNumber": click_number})
         except Exception as e:
             print(f"Error processing post {index} on Page {page_number}: {str(e)}")
+            page_posts.append({"Index": index, "Links": None, "ClickNumber": "No Click"})
+
+    return page_posts
+
+# Function to pick the link of each post: the first one not saved yet
+def select_links(page_number, page_posts, processed_links):
+    combined_data = []
+    for post in page_posts:
+        if post["Links"] is None:
+            # The post could not be read
             combined_data.append({
                 "Page": page_number,
-                "Index": index,
+                "Index": post["Index"],
                 "Link": "No Link",
                 "ClickNumber": "No Click"
             })
+            continue
+
+        link = "No Link"
+        for hrefs in post["Links"]:
+            for href in hrefs:
+                if href not in processed_links:
+                    link = href
+                    break
+
+        if link not in processed_links:
+            combined_data.append({
+                "Page": page_number,
+                "Index": post["Index"],
+                "Link": link,
+                "ClickNumber": post["ClickNumber"]
+            })
 
     return combined_data
 
+# Function to load one page, retrying failures (a page without posts is not a failure)
+def load_page(driver, url, page_number):
+    for attempt in range(1, page_retries + 2):
+        try:
+            return scrape_page_posts(driver, url, page_number)
+        except Exception as e:
+            print(f"Error loading page {page_number} (attempt {attempt}/{page_retries + 1}): {str(e)}")
+            if attempt > page_retries:
+                raise
+
+# Worker: scrape every page_workers-th page with its own browser until a page is empty.
+# Posts (page_number, posts, None) per page, (page_number, None, error) when it fails,
+# and always (None, None, None) when it exits.
+def scrape_shard(first_page, base_url, total_pages, results, stop):
+    driver = None
+    page_number = first_page
+    try:
+        driver = make_driver()
+        for page_number in range(first_page, total_pages + 1, page_workers):
+            if stop.is_set():
+                break
+            page_posts = load_page(driver, base_url.format(page_number), page_number)
+            results.put((page_number, page_posts, None))
+            # Later pages of this shard are past the end of the listing
+            if not page_posts:
+                break
+    except Exception as e:
+        results.put((page_number, None, e))
+    finally:
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception as e:
+                print(f"Error closing browser: {str(e)}")
+        results.put((None, None, None))
+
+def scrape_pages(base_url, total_pages):
+    """Yield (page_number, posts) in page order while page_workers browsers fetch pages in parallel.
+
+    Stop iterating (e.g. at the first empty page) to make the workers finish
+    their current page and exit. Raises RuntimeError when a page could not be
+    scraped, after yielding every page before it.
+    """
+    results = queue.Queue()
+    stop = threading.Event()
+    workers = max(1, min(page_workers, total_pages))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    for first_page in range(1, workers + 1):
+        executor.submit(scrape_shard, first_page, base_url, total_pages, results, stop)
+
+    finished_pages = {}
+    next_page = 1
+    active = workers
+    try:
+        while next_page <= total_pages:
+            if next_page in finished_pages:
+                page_posts, error = finished_pages.pop(next_page)
+                if error is not None:
+                    raise RuntimeError(f"Could not scrape page {next_page}: {error}") from error
+                yield next_page, page_posts
+                next_page += 1
+                continue
+            if not active:
+                # A shard ended before this page (its previous page was empty)
+                return
+            page_number, page_posts, error = results.get()
+            if page_number is None:
+                active -= 1
+            else:
+                finished_pages[page_number] = (page_posts, error)
+    finally:
+        stop.set()
+        # Let the workers finish their current page and quit their browsers
+        executor.shutdown(wait=True, cancel_futures=True)
+
 # Main function to control the scraping process
 def main():
     base_url = "https://www.livinginsider.com/searchword_en/Condo/Rent/{}/property-listing-condo-for-rent.html"
@@ -108,25 +220,36 @@ def main():
     output_file = "property_details.csv"
 
     # Load processed links to avoid duplicates
-    processed_links = load_processed_links(output_file)
+    if output_format == "parquet":
+        processed_links = load_processed_values(output_format, "livinginsider_links", output_file, "Link")
+    else:
+        processed_links = load_processed_links(output_file)
     print(f"Loaded {len(processed_links)} processed links from {output_file}")
 
-    all_combined_data = []
     fieldnames = ["Page", "Index", "Link", "ClickNumber"]
 
-    for page_number in range(1, total_pages + 1):
-        url = base_url.format(page_number)
+    with open_record_sink(output_format, "livinginsider_links", "livinginsider", output_file, fieldnames) as sink, \
+            (CrawlFrontier() if use_frontier else nullcontext()) as frontier:
+        # Pages arrive in order, so links are picked against the links saved so far,
+        # as in a serial run
+        for page_number, page_posts in scrape_pages(base_url, total_pages):
+            page_data = select_links(page_number, page_posts, processed_links)
+            if not page_data:
+                print(f"No more data found on page {page_number}. Ending scraping.")
+                break
 
-        # Scrape links and click numbers together
-        page_data = scrape_page_with_clicks(url, page_number, processed_links)
-        if not page_data:
-            print(f"No more data found on page {page_number}. Ending scraping.")
-            break
+            # Save incrementally
+            for row in page_data:
+                sink.write(row)
+            processed_links.update(row["Link"] for row in page_data)
+            print(f"Saved {len(page_data)} rows from page {page_number} to {output_file}")
 
-        # Save incrementally
-        save_to_csv(output_file, page_data, fieldnames)
-        processed_links.update(row["Link"] for row in page_data)
-        print(f"Saved {len(page_data)} rows from page {page_number} to {output_file}")
+            if frontier is not None:
+                added = frontier.enqueue_many(frontier_queue, [
+                    (row["Link"], {"Page": row["Page"], "Index": row["Index"], "ClickNumber": row["ClickNumber"]})
+                    for row in page_data if row["Link"] != "No Link"
+                ])
+                print(f"Queued {added} new links in the crawl frontier")
 
     print(f"Scraping completed. Total data saved to {output_file}.")
 
@@ -135,5 +258,5 @@ if __name__ == "__main__":
         main()
     except KeyboardInterrupt:
         print("\nScraping interrupted by user. Data saved up to the last completed page.")
-    finally:
-        driver.quit()
+    except RuntimeError as e:
+        print(f"Scraping stopped: {str(e)}. Data saved up to the last completed page.")
@@ -1,8 +1,7 @@
 from lxml import html
-import requests
-import csv
 import pandas as pd
-import os
+from columnar_sink import open_record_sink, load_processed_values
+from fetch_client import FetchClient
 
 # Load links and metadata from condo_data_combined.csv
 csv_file_combined = 'condo_data_combined.csv'
@@ -14,19 +13,30 @@ valid_links = combined_data[combined_data["Link"] != "No Link"]
 # Filepath for incremental saving
 output_file = 'property_details.csv'
 
-# Check if file exists (for resuming)
-if os.path.exists(output_file):
-    processed_data = pd.read_csv(output_file).to_dict(orient="records")
-    processed_links = {row["link"] for row in processed_data}
-else:
-    processed_data = []
-    processed_links = set()
+output_fieldnames = [
+    "post_title", "condo_name", "location", "price", "price_per_space",
+    "space", "floor", "bedroom", "bathroom",
+    "link", "click", "Page", "index"
+]
+
+# Output format: "csv", or "parquet" for typed columnar files under parquet/ (needs pyarrow)
+output_format = "csv"
+
+# Load only the links already saved (for resuming); rows stay on disk
+processed_links = load_processed_values(output_format, "livinginsider_details", output_file, "link")
+
+# Rows are flushed to disk every batch_size records and fsynced every fsync_every records
+batch_size = 50
+fsync_every = 500
+
+# Keep-alive session with conditional revalidation, shared by every request
+client = FetchClient()
 
 # Function to scrape data for a single property
 def scrape_property_details(url):
     try:
         # Send an HTTP GET request to the URL
-        response = requests.get(url)
+        response = client.get(url)
         response.raise_for_status()  # Raise an exception for HTTP errors
 
         # Parse the HTML content
@@ -110,45 +120,35 @@ def scrape_property_details(url):
 
 # Main function to process all links
 def main():
-    global processed_data
-
     try:
-        for _, row in valid_links.iterrows():
-            url = row["Link"]
-
-            # Skip already processed links
-            if url in processed_links:
-                print(f"Skipping already processed URL: {url}")
-                continue
-
-            print(f"Processing URL: {url}")
-            property_details = scrape_property_details(url)
-
-            if property_details:
-                # Add metadata from condo_data_combined.csv
-                property_details["link"] = url
-                property_details["click"] = row["ClickNumber"]
-                property_details["Page"] = row["Page"]
-                property_details["index"] = row["Index"]
-
-                # Ensure no empty cells
-                for key, value in property_details.items():
-                    if value == "" or value is None:
-                        property_details[key] = "Not Found"
-
-                # Add to processed data
-                processed_data.append(property_details)
-                processed_links.add(url)
-
-                # Save incrementally
-                with open(output_file, mode='w', newline='', encoding='utf-8') as file:
-                    writer = csv.DictWriter(file, fieldnames=[
-                        "post_title", "condo_name", "location", "price", "price_per_space",
-                        "space", "floor", "bedroom", "bathroom",
-                        "link", "click", "Page", "index"
-                    ])
-                    writer.writeheader()
-                    writer.writerows(processed_data)
+        with open_record_sink(output_format, "livinginsider_details", "livinginsider",
+                              output_file, output_fieldnames, batch_size, fsync_every) as sink:
+            for _, row in valid_links.iterrows():
+                url = row["Link"]
+
+                # Skip already processed links
+                if url in processed_links:
+                    print(f"Skipping already processed URL: {url}")
+                    continue
+
+                print(f"Processing URL: {url}")
+                property_details = scrape_property_details(url)
+
+                if property_details:
+                    # Add metadata from condo_data_combined.csv
+                    property_details["link"] = url
+                    property_details["click"] = row["ClickNumber"]
+                    property_details["Page"] = row["Page"]
+                    property_details["index"] = row["Index"]
+
+                    # Ensure no empty cells
+                    for key, value in property_details.items():
+                        if value == "" or value is None:
+                            property_details[key] = "Not Found"
+
+                    # Append to property_details.csv
+                    sink.write(property_details)
+                    processed_links.add(url)
 
     except KeyboardInterrupt:
         print("\nEarly stopping triggered. Data saved incrementally.")
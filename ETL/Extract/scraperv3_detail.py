@@ -1,99 +1,184 @@
-import csv
-import requests
-import pandas as pd
 import os
+import pandas as pd
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from lxml import html
+from columnar_sink import open_record_sink, load_processed_values, reset_records, reextracted_suffix
+from crawl_frontier import CrawlFrontier, drain
+from fetch_client import FetchClient
+from page_archive import PageArchive, replay
+from selector_chain import SelectorChain, export_stats
 
 # Load links and metadata from condo_data_combined.csv
 csv_file_combined = 'links.csv'
-combined_data = pd.read_csv(csv_file_combined)
 
-# Filter only rows with valid links
-valid_links = combined_data[combined_data["Link"] != "No Link"]
+# With use_frontier, listings are leased from the shared crawl frontier (filled
+# by scraperV2_links.py) instead of links.csv; the scraper keeps polling for
+# frontier_idle_polls x frontier_idle_wait seconds while discovery is running
+use_frontier = False
+frontier_queue = "livinginsider_details"
+frontier_batch_size = 100
+frontier_idle_polls = 3
+frontier_idle_wait = 30
+
+def load_valid_links():
+    combined_data = pd.read_csv(csv_file_combined)
+    # Filter only rows with valid links
+    return combined_data[combined_data["Link"] != "No Link"]
 
 # Filepath for incremental saving
 output_file = 'property_details.csv'
 nearby_file = 'nearby.csv'
 
-# Check if files exist (for resuming)
-if os.path.exists(output_file):
-    processed_data = pd.read_csv(output_file).to_dict(orient="records")
-    processed_links = {row["link"] for row in processed_data}
-else:
-    processed_data = []
-    processed_links = set()
-
-if os.path.exists(nearby_file):
-    nearby_data = pd.read_csv(nearby_file).to_dict(orient="records")
-    processed_nearby_links = {row["link"] for row in nearby_data}
-else:
-    nearby_data = []
-    processed_nearby_links = set()
-
-# Function to scrape data for a single property
-def scrape_property_details(url):
+# Column layout of the output files
+output_fieldnames = [
+    "post_title", "condo_name", "location", "price", "price_per_space",
+    "space", "floor", "bedroom", "bathroom",
+    "link", "click", "Page", "index"
+]
+nearby_fieldnames = ["Condo_name", "NearBy", "Distance", "link"]
+
+# Output format: "csv", or "parquet" for typed columnar files under parquet/ (needs pyarrow)
+output_format = "csv"
+
+# Load only the links already saved (for resuming); rows stay on disk
+processed_links = load_processed_values(output_format, "livinginsider_details", output_file, "link")
+processed_nearby_links = load_processed_values(output_format, "livinginsider_nearby", nearby_file, "link")
+
+# Rows are flushed to disk every batch_size records and fsynced every fsync_every records
+batch_size = 50
+fsync_every = 500
+
+# Hit statistics of the XPath fallback chains, written at the end of a run
+selector_stats_file = 'selector_stats.json'
+
+# Keep every fetched page in the local page archive, so extraction can be re-run
+# offline with reextract = True (written to the *_reextracted files, using
+# reextract_processes worker processes; None means all cores)
+archive_pages = False
+archive_source = "livinginsider"
+reextract = False
+reextract_processes = None
+reextract_output_file = 'property_details_reextracted.csv'
+reextract_nearby_file = 'nearby_reextracted.csv'
+
+# Concurrency settings: number of parallel fetch workers and the maximum
+# number of requests per second sent to a single host
+max_workers = 8
+requests_per_second_per_host = 4
+
+# Spaces out requests to the same host so the worker pool stays polite
+class HostRateLimiter:
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = {}
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+rate_limiter = HostRateLimiter(requests_per_second_per_host)
+
+# Keep-alive session shared by the worker threads; unchanged pages are revalidated with a 304
+client = FetchClient(timeout=30)
+
+# Rate-limited HTTP GET shared by the scrape functions
+def fetch(url):
+    rate_limiter.wait(url)
+    response = client.get(url)
+    response.raise_for_status()  # Raise an exception for HTTP errors
+    return response
+
+archive = PageArchive() if archive_pages or reextract else None
+
+# Download and parse a listing page once so every extractor shares the same tree
+def fetch_tree(url):
+    response = fetch(url)
+    if archive_pages:
+        archive.put(url, response.content, archive_source, response.headers.get("Content-Type"))
+    return html.fromstring(response.content)
+
+# XPaths for property details; the variants of a field are fallbacks for different page layouts
+property_xpaths = {
+    "post_title": [
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[3]/h1',
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[2]/h1'
+    ],
+    "price": [
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[6]/div[2]/div/span[1]/b',
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[5]/div[2]/div/span[1]/b',
+        '/html/body/div[4]/section[2]/div/div[2]/div[1]/div[3]/div[1]/div[5]/div[2]/div/span[1]/b'
+    ],
+    "price_per_space": [
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[6]/div[3]/div/div/span',
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[7]/div[3]/div/div/span',
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[8]/div[3]/div/div/span',
+        '/html/body/div[4]/section[2]/div/div[2]/div[1]/div[3]/div[1]/div[7]/div[3]/div/div/span'
+    ],
+    "condo_name": [
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[17]/div[1]/div[1]/div[1]/a',
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[16]/div[1]/div[1]/div[1]/a',
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[15]/div[1]/div[1]/div[1]/a'
+    ],
+    "location": [
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[17]/div[1]/div[1]/div[2]/a',
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[16]/div[1]/div[1]/div[2]/a',
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[15]/div[1]/div[1]/div[2]/a'
+    ],
+    "space": [
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[5]/div/div[1]/div/div/div[2]/span'
+    ],
+    "floor": [
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[5]/div/div[3]/div/div/div[2]/span'
+    ],
+    "bedroom": [
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[5]/div/div[5]/div/div/div[2]/span'
+    ],
+    "bathroom": [
+        '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[5]/div/div[7]/div/div/div[2]/span'
+    ]
+}
+
+# Fallback chains compiled once and reordered by hit rate (see selector_chain.py)
+property_chains = [SelectorChain(key, paths) for key, paths in property_xpaths.items()]
+
+# XPaths for nearby places
+nearby_chains = {
+    "names": [
+        SelectorChain("nearby_name_1", ['/html/body/div[4]/section[2]/div/div[2]/div[1]/div[3]/div[2]/div[16]/div/ul/li[1]/a/span/text()']),
+        SelectorChain("nearby_name_2", ['/html/body/div[4]/section[2]/div/div[2]/div[1]/div[3]/div[2]/div[16]/div/ul/li[2]/a/span/text()'])
+    ],
+    "distances": [
+        SelectorChain("nearby_distance_1", ['/html/body/div[4]/section[2]/div/div[2]/div[1]/div[3]/div[2]/div[16]/div/ul/li[1]/a/p']),
+        SelectorChain("nearby_distance_2", ['/html/body/div[4]/section[2]/div/div[2]/div[1]/div[3]/div[2]/div[16]/div/ul/li[2]/a/p'])
+    ],
+    "spans": SelectorChain("nearby_spans", ['/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[17]/div/ul/li/a/span']),
+    "paragraphs": SelectorChain("nearby_paragraphs", ['/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[17]/div/ul/li/a/p'])
+}
+
+def all_chains():
+    return property_chains + nearby_chains["names"] + nearby_chains["distances"] + \
+        [nearby_chains["spans"], nearby_chains["paragraphs"]]
+
+# Function to extract data for a single property from its parsed page
+def scrape_property_details(tree):
     try:
-        # Send an HTTP GET request to the URL
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-
-        # Parse the HTML content
-        tree = html.fromstring(response.content)
-
-        # Define XPaths for property details
-        xpaths = {
-            "post_title": [
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[3]/h1',
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[2]/h1'
-            ],
-            "price": [
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[6]/div[2]/div/span[1]/b',
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[5]/div[2]/div/span[1]/b',
-                '/html/body/div[4]/section[2]/div/div[2]/div[1]/div[3]/div[1]/div[5]/div[2]/div/span[1]/b'
-            ],
-            "price_per_space": [
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[6]/div[3]/div/div/span',
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[7]/div[3]/div/div/span',
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[1]/div[8]/div[3]/div/div/span',
-                '/html/body/div[4]/section[2]/div/div[2]/div[1]/div[3]/div[1]/div[7]/div[3]/div/div/span'
-            ],
-            "condo_name": [
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[17]/div[1]/div[1]/div[1]/a',
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[16]/div[1]/div[1]/div[1]/a',
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[15]/div[1]/div[1]/div[1]/a'
-            ],
-            "location": [
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[17]/div[1]/div[1]/div[2]/a',
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[16]/div[1]/div[1]/div[2]/a',
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[15]/div[1]/div[1]/div[2]/a'
-            ],
-            "space": [
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[5]/div/div[1]/div/div/div[2]/span'
-            ],
-            "floor": [
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[5]/div/div[3]/div/div/div[2]/span'
-            ],
-            "bedroom": [
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[5]/div/div[5]/div/div/div[2]/span'
-            ],
-            "bathroom": [
-                '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[5]/div/div[7]/div/div/div[2]/span'
-            ]
-        }
-
         # Extract property details with fallback logic
         property_details = {}
-        for key, paths in xpaths.items():
-            value = "Not Found"
-            for xpath in paths:
-                try:
-                    result = tree.xpath(xpath)
-                    if result:
-                        value = result[0].text_content().strip()
-                        break  # Use the first XPath that works
-                except Exception as e:
-                    print(f"Error extracting {key} with XPath {xpath}: {e}")
-            property_details[key] = value
+        for chain in property_chains:
+            element = chain.first(tree)
+            property_details[chain.name] = element.text_content().strip() if element is not None else "Not Found"
 
         # Clean condo_name and location to extract text only
         if property_details["condo_name"] != "Not Found":
@@ -113,39 +198,19 @@ def scrape_property_details(url):
         return property_details
 
     except Exception as e:
-        print(f"Error scraping {url}: {e}")
+        print(f"Error extracting property details: {e}")
         return None
 
-# Function to scrape nearby places for a property
-def scrape_nearby_places(url):
+# Function to extract nearby places for a property from its parsed page
+def scrape_nearby_places(tree):
     try:
-        # Send an HTTP GET request to the URL
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-
-        # Parse the HTML content
-        tree = html.fromstring(response.content)
-
-        # Define XPaths for nearby places
-        nearby_xpath_names = [
-            '/html/body/div[4]/section[2]/div/div[2]/div[1]/div[3]/div[2]/div[16]/div/ul/li[1]/a/span/text()',
-            '/html/body/div[4]/section[2]/div/div[2]/div[1]/div[3]/div[2]/div[16]/div/ul/li[2]/a/span/text()'
-        ]
-        nearby_xpath_distances = [
-            '/html/body/div[4]/section[2]/div/div[2]/div[1]/div[3]/div[2]/div[16]/div/ul/li[1]/a/p',
-            '/html/body/div[4]/section[2]/div/div[2]/div[1]/div[3]/div[2]/div[16]/div/ul/li[2]/a/p'
-        ]
-
-        spans_xpath = '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[17]/div/ul/li/a/span'
-        paragraphs_xpath = '/html/body/div[4]/section[2]/div/div/div[1]/div[3]/div[2]/div[17]/div/ul/li/a/p'
-
         nearby_list = []
 
         # First, try the specified XPaths
-        for name_xpath, distance_xpath in zip(nearby_xpath_names, nearby_xpath_distances):
+        for name_chain, distance_chain in zip(nearby_chains["names"], nearby_chains["distances"]):
             try:
-                name = tree.xpath(name_xpath)
-                distance = tree.xpath(distance_xpath)
+                name = name_chain.evaluate(tree)
+                distance = distance_chain.evaluate(tree)
 
                 if name and distance:
                     name = name[0].strip()
@@ -159,8 +224,8 @@ def scrape_nearby_places(url):
 
         # If the previous XPaths did not find all necessary elements, try the new XPaths
         if not nearby_list or all(item["Name"] == "Not Found" for item in nearby_list):
-            spans = tree.xpath(spans_xpath)
-            paragraphs = tree.xpath(paragraphs_xpath)
+            spans = nearby_chains["spans"].evaluate(tree)
+            paragraphs = nearby_chains["paragraphs"].evaluate(tree)
 
             if spans and paragraphs:
                 for span, paragraph in zip(spans, paragraphs):
@@ -173,12 +238,86 @@ def scrape_nearby_places(url):
 
         return nearby_list
     except Exception as e:
-        print(f"Error scraping nearby places from {url}: {e}")
+        print(f"Error extracting nearby places: {e}")
         return [{"Name": "Not Found", "Distance": "Not Found"}]
 
-# Main function to process all links
-def main():
-    global processed_data, nearby_data
+# Extractors run against each downloaded page; add new record types here
+extractors = {
+    "details": scrape_property_details,
+    "nearby": scrape_nearby_places
+}
+
+# Fetch one listing and run every extractor on the same tree (runs in a worker thread)
+def scrape_listing(url):
+    try:
+        tree = fetch_tree(url)
+    except Exception as e:
+        print(f"Error scraping {url}: {e}")
+        return {}
+    return run_extractors(tree)
+
+def run_extractors(tree):
+    return {name: extractor(tree) for name, extractor in extractors.items()}
+
+# Run the extractors on an archived page body (runs in a worker process)
+def extract_archived_page(content):
+    return run_extractors(html.fromstring(content))
+
+# Write the details and nearby rows of one fetched listing; False when the fetch failed.
+# details_done / nearby_done default to the links already in the output files
+def save_listing(row, records, details_sink, nearby_sink, details_done=None, nearby_done=None):
+    details_done = processed_links if details_done is None else details_done
+    nearby_done = processed_nearby_links if nearby_done is None else nearby_done
+    url = row["Link"]
+    print(f"Processing property details URL: {url}")
+    property_details = records.get("details")
+
+    if not property_details:
+        return False
+
+    if url not in details_done:
+        # Add metadata from condo_data_combined.csv
+        property_details["link"] = url
+        property_details["click"] = row["ClickNumber"]
+        property_details["Page"] = row["Page"]
+        property_details["index"] = row["Index"]
+
+        # Ensure no empty cells
+        for key, value in property_details.items():
+            if value == "" or value is None:
+                property_details[key] = "Not Found"
+
+        # Append to property_details.csv
+        details_sink.write(property_details)
+        details_done.add(url)
+
+    # Append nearby places to nearby.csv
+    if url not in nearby_done:
+        print(f"Processing nearby places for URL: {url}")
+
+        # Written as one unit, so a crash never leaves a listing with part of its places
+        nearby_sink.write_rows([
+            {
+                "Condo_name": property_details["condo_name"],
+                "NearBy": place["Name"],
+                "Distance": place["Distance"],
+                "link": url
+            }
+            for place in records["nearby"]
+        ])
+        nearby_done.add(url)
+    return True
+
+def open_sinks():
+    return (
+        open_record_sink(output_format, "livinginsider_details", "livinginsider",
+                         output_file, output_fieldnames, batch_size, fsync_every),
+        open_record_sink(output_format, "livinginsider_nearby", "livinginsider",
+                         nearby_file, nearby_fieldnames, batch_size, fsync_every)
+    )
+
+def scrape_from_csv(executor, details_sink, nearby_sink):
+    valid_links = load_valid_links()
 
     # Calculate and print remaining URLs for property details
     remaining_property_details = len(valid_links) - len(processed_links)
@@ -188,77 +327,97 @@ def main():
     remaining_nearby_places = len(valid_links) - len(processed_nearby_links)
     print(f"Remaining nearby places to process: {remaining_nearby_places}")
 
+    # Queue links missing either record type; a crash between the two files is repaired here
+    pending_rows = [
+        row for _, row in valid_links.iterrows()
+        if row["Link"] not in processed_links or row["Link"] not in processed_nearby_links
+    ]
+    print(f"Fetching {len(pending_rows)} URLs with {max_workers} workers")
+
+    # executor.map fetches concurrently but yields results in input order
+    results = executor.map(scrape_listing, [row["Link"] for row in pending_rows])
+    for done, (row, records) in enumerate(zip(pending_rows, results), start=1):
+        if save_listing(row, records, details_sink, nearby_sink):
+            print(f"Remaining URLs to process: {len(pending_rows) - done}")
+
+def scrape_from_frontier(executor, details_sink, nearby_sink):
+    with CrawlFrontier() as frontier:
+        # Listings already in both output files count as done
+        frontier.mark_done(frontier_queue, processed_links & processed_nearby_links)
+        print(f"Frontier '{frontier_queue}': {frontier.counts(frontier_queue)}")
+
+        for batch in drain(frontier, frontier_queue, frontier_batch_size, frontier_idle_polls, frontier_idle_wait):
+            rows = [dict(metadata, Link=url) for url, metadata in batch]
+            results = executor.map(scrape_listing, [row["Link"] for row in rows])
+            saved = []
+            failed = set()
+            try:
+                for row, records in zip(rows, results):
+                    if save_listing(row, records, details_sink, nearby_sink):
+                        saved.append(row["Link"])
+                    else:
+                        frontier.fail(frontier_queue, row["Link"], "fetch failed")
+                        failed.add(row["Link"])
+            finally:
+                # Completed only once the rows are on disk (fsynced)
+                for sink in (details_sink, nearby_sink):
+                    sink.flush()
+                    sink.checkpoint()
+                for url in saved:
+                    frontier.complete(frontier_queue, url)
+                # Leases not reached (interrupted run) go straight back to the queue
+                for url, _ in batch:
+                    if url not in failed and url not in saved:
+                        frontier.release(frontier_queue, url)
+            print(f"Frontier '{frontier_queue}': {frontier.counts(frontier_queue)}")
+
+# Replay the extractors over the latest archived page of every listing, without fetching
+def reextract_from_archive():
+    # Listing metadata (click count, page, index) still comes from links.csv when present
+    metadata = {}
+    if os.path.exists(csv_file_combined):
+        metadata = {row["Link"]: row for row in load_valid_links().to_dict("records")}
+
+    # Each run rebuilds the re-extracted outputs instead of appending to them
+    details_type = "livinginsider_details" + reextracted_suffix
+    nearby_type = "livinginsider_nearby" + reextracted_suffix
+    reset_records(output_format, details_type, reextract_output_file)
+    reset_records(output_format, nearby_type, reextract_nearby_file)
+
+    details_done, nearby_done = set(), set()
+    with open_record_sink(output_format, details_type, "livinginsider",
+                          reextract_output_file, output_fieldnames, batch_size, fsync_every) as details_sink, \
+            open_record_sink(output_format, nearby_type, "livinginsider",
+                             reextract_nearby_file, nearby_fieldnames, batch_size, fsync_every) as nearby_sink:
+        for url, records in replay(archive, archive_source, extract_archived_page, reextract_processes):
+            row = metadata.get(url, {"Link": url, "ClickNumber": "", "Page": "", "Index": ""})
+            save_listing(row, records or {}, details_sink, nearby_sink, details_done, nearby_done)
+    print(f"Re-extracted {len(details_done)} listings to {reextract_output_file} and {reextract_nearby_file}.")
+
+# Main function to process all links
+def main():
+    if reextract:
+        reextract_from_archive()
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
     try:
-        for _, row in valid_links.iterrows():
-            url = row["Link"]
-
-            # Skip already processed links for property details
-            if url in processed_links:
-                print(f"Skipping already processed property details URL: {url}")
-                continue
-
-            print(f"Processing property details URL: {url}")
-            property_details = scrape_property_details(url)
-
-            if property_details:
-                # Add metadata from condo_data_combined.csv
-                property_details["link"] = url
-                property_details["click"] = row["ClickNumber"]
-                property_details["Page"] = row["Page"]
-                property_details["index"] = row["Index"]
-
-                # Ensure no empty cells
-                for key, value in property_details.items():
-                    if value == "" or value is None:
-                        property_details[key] = "Not Found"
-
-                # Add to processed data
-                processed_data.append(property_details)
-                processed_links.add(url)
-
-                # Update and print the remaining count after processing each link
-                remaining_property_details -= 1
-                print(f"Remaining property details to process: {remaining_property_details}")
-
-                # Save incrementally
-                with open(output_file, mode='w', newline='', encoding='utf-8') as file:
-                    writer = csv.DictWriter(file, fieldnames=[
-                        "post_title", "condo_name", "location", "price", "price_per_space",
-                        "space", "floor", "bedroom", "bathroom",
-                        "link", "click", "Page", "index"
-                    ])
-                    writer.writeheader()
-                    writer.writerows(processed_data)
-
-                # Scrape and save nearby places incrementally
-                if url not in processed_nearby_links:
-                    print(f"Processing nearby places for URL: {url}")
-                    nearby_places = scrape_nearby_places(url)
-
-                    for place in nearby_places:
-                        nearby_data.append({
-                            "Condo_name": property_details["condo_name"],
-                            "NearBy": place["Name"],
-                            "Distance": place["Distance"],
-                            "link": url
-                        })
-
-                    # Update and print the remaining count for nearby places
-                    remaining_nearby_places -= 1
-                    print(f"Remaining nearby places to process: {remaining_nearby_places}")
-
-                    # Save incrementally to nearby.csv
-                    with open(nearby_file, mode='w', newline='', encoding='utf-8') as file:
-                        writer = csv.DictWriter(file, fieldnames=["Condo_name", "NearBy", "Distance", "link"])
-                        writer.writeheader()
-                        writer.writerows(nearby_data)
-
-                    processed_nearby_links.add(url)
+        details_sink, nearby_sink = open_sinks()
+        with details_sink, nearby_sink:
+            if use_frontier:
+                scrape_from_frontier(executor, details_sink, nearby_sink)
+            else:
+                scrape_from_csv(executor, details_sink, nearby_sink)
 
     except KeyboardInterrupt:
         print("\nEarly stopping triggered. Data saved incrementally for both property details and nearby places.")
     except Exception as e:
         print(f"An error occurred: {e}")
+    finally:
+        # Drop queued work so an interrupted run exits promptly
+        executor.shutdown(wait=False, cancel_futures=True)
+        export_stats(all_chains(), selector_stats_file)
+        print(f"Selector hit statistics saved to {selector_stats_file}")
 
     print("Scraping and merging completed. Data saved to property_details.csv and nearby.csv.")
 
@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+from lxml import etree
+
+# Ordered fallback XPaths for one field. Each variant is compiled once per
+# thread (compiled XPath objects must not be shared between threads) and the
+# variants are tried in order of past hits, so the common page layout is
+# evaluated first. Hit counts are kept for monitoring.
+class SelectorChain:
+    def __init__(self, name, paths):
+        self.name = name
+        self.paths = list(paths)
+        self.hits = [0] * len(self.paths)
+        self.misses = 0
+        self.order = list(range(len(self.paths)))
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        # Fail at startup on a malformed expression, not on the first page
+        self.compiled()
+
+    def compiled(self):
+        compiled = getattr(self.local, "compiled", None)
+        if compiled is None:
+            compiled = self.local.compiled = [etree.XPath(path) for path in self.paths]
+        return compiled
+
+    def evaluate(self, tree):
+        """Result list of the first variant that matches, or [] when none does."""
+        compiled = self.compiled()
+        for position in self.order:
+            try:
+                result = compiled[position](tree)
+            except etree.XPathError as e:
+                print(f"Error extracting {self.name} with XPath {self.paths[position]}: {e}")
+                continue
+            if result:
+                self.record(position)
+                return result
+        with self.lock:
+            self.misses += 1
+        return []
+
+    def first(self, tree):
+        result = self.evaluate(tree)
+        return result[0] if result else None
+
+    def record(self, position):
+        with self.lock:
+            self.hits[position] += 1
+            rank = self.order.index(position)
+            # Move up only when this variant overtook the one tried before it
+            if rank and self.hits[self.order[rank - 1]] < self.hits[position]:
+                # Stable sort: ties keep the declared order
+                self.order = sorted(self.order, key=lambda i: -self.hits[i])
+
+    def stats(self):
+        with self.lock:
+            return {
+                "order": [self.paths[position] for position in self.order],
+                "hits": {path: hits for path, hits in zip(self.paths, self.hits)},
+                "misses": self.misses
+            }
+
+def export_stats(chains, filename):
+    """Write the hit statistics of every chain to a JSON file (replaced atomically)."""
+    temp_file = filename + ".tmp"
+    with open(temp_file, mode='w', encoding='utf-8') as file:
+        json.dump({chain.name: chain.stats() for chain in chains}, file, indent=2)
+    os.replace(temp_file, filename)
@@ -0,0 +1,26 @@
+from crawl_frontier import CrawlFrontier
+
+queue = "details"
+
+def test_mark_done_moves_pending_urls_to_done(tmp_path):
+    with CrawlFrontier(str(tmp_path / "frontier.db")) as frontier:
+        frontier.enqueue_many(queue, [("https://a/1.html", None), ("https://a/2.html", None)])
+        # Seeding from the output files of an earlier run
+        assert frontier.mark_done(queue, ["https://a/1.html", "https://a/3.html"]) == 2
+        assert frontier.counts(queue) == {"pending": 1, "done": 2}
+        assert frontier.lease(queue, 10) == [("https://a/2.html", {})]
+
+def test_mark_done_releases_leased_urls(tmp_path):
+    with CrawlFrontier(str(tmp_path / "frontier.db")) as frontier:
+        frontier.enqueue(queue, "https://a/1.html")
+        assert frontier.lease(queue) == [("https://a/1.html", {})]
+        frontier.mark_done(queue, ["https://a/1.html"])
+        assert frontier.counts(queue) == {"done": 1}
+        # Already done: nothing changes
+        assert frontier.mark_done(queue, ["https://a/1.html"]) == 0
+
+def test_enqueue_does_not_reopen_done_urls(tmp_path):
+    with CrawlFrontier(str(tmp_path / "frontier.db")) as frontier:
+        frontier.mark_done(queue, ["https://a/1.html"])
+        assert not frontier.enqueue(queue, "https://a/1.html")
+        assert frontier.lease(queue) == []
@@ -0,0 +1,21 @@
+import pytest
+from bench_parsers import fixture_dir, load_fixtures
+from listing_parsers import available_parsers, get_parser
+
+files, pages = load_fixtures([fixture_dir])
+
+def extract(name, content):
+    parser = get_parser(name)
+    return parser.extract(parser.parse(content))
+
+@pytest.mark.parametrize("name", [name for name in available_parsers() if name != "bs4"])
+@pytest.mark.parametrize("page", range(len(pages)), ids=files)
+def test_backend_matches_bs4(name, page):
+    expected = extract("bs4", pages[page])
+    assert expected
+    assert extract(name, pages[page]) == expected
+
+@pytest.mark.parametrize("name", available_parsers())
+@pytest.mark.parametrize("content", ["", "   \n", "<!-- nothing -->", "<html><body></body></html>"])
+def test_empty_document_has_no_listings(name, content):
+    assert extract(name, content) == []
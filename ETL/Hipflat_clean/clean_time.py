@@ -0,0 +1,98 @@
+import argparse
+import pandas as pd
+from currency import load_rates, normalize_long
+from history_store import HistoryStore, link_hashes, pivot_series
+
+# Columns that identify one point of a Hipflat price chart
+key_columns = ['currencyStringFormat', 'date', 'link', 'condo_name']
+
+# Chart series types by currencyStringFormat, before rent series are told apart
+series_types = {
+    'USD%s': 'Price',
+    'USD%s/sqm': 'Price Per Space'
+}
+
+# Rent counterpart of each sale series type
+rent_types = {
+    'Price': 'Rent',
+    'Price Per Space': 'Rent Per Space'
+}
+
+def extract_condo_name(links):
+    """Project slug from each Hipflat project URL (NaN when the URL has none)."""
+    return links.str.extract(r'projects/([a-zA-Z0-9\-]+)', expand=False)
+
+def assign_type(formats):
+    """'Price', 'Price Per Space' or 'Other' for each currencyStringFormat."""
+    return formats.map(series_types).fillna('Other')
+
+def update_type(df):
+    """Relabel sale series points that are really rent.
+
+    Sale and rent charts share the same currencyStringFormat, so a 'Price' or
+    'Price Per Space' row is rent when another row with the same
+    currencyStringFormat, date, link and condo_name has a higher value. The
+    counts match the original row-by-row version: one per (row, higher match)
+    pair. Runs as a groupby/rank instead of a filter per row.
+    """
+    values = df.groupby(key_columns, sort=False)['value']
+    # Number of rows in the same group with a strictly higher value
+    higher = (values.transform('count') - values.rank(method='max')).fillna(0)
+
+    rent_count = int(higher[df['type'] == 'Price'].sum())
+    rent_per_space_count = int(higher[df['type'] == 'Price Per Space'].sum())
+
+    is_rent = (higher > 0) & df['type'].isin(list(rent_types))
+    df.loc[is_rent, 'type'] = df.loc[is_rent, 'type'].map(rent_types)
+
+    return df, rent_count, rent_per_space_count
+
+def pivot_history(df):
+    """One row per series with a column per month, months in chronological order."""
+    return pivot_series(df)
+
+def clean_history(df, rates=None):
+    df['condo_name'] = extract_condo_name(df['link'])
+    df['type'] = assign_type(df['currencyStringFormat'])
+    df, rent_count, rent_per_space_count = update_type(df)
+    print(f"Rent count: {rent_count}, Rent Per Space count: {rent_per_space_count}")
+    # Types are assigned from the original currency formats, so convert afterwards
+    if rates is not None:
+        df = normalize_long(df, rates)
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description="Label and pivot Hipflat historical chart data.")
+    parser.add_argument("input", nargs="?", default="time.csv")
+    parser.add_argument("output", nargs="?", default="time_test.csv")
+    parser.add_argument("--rates", default=None, help="dated rate table CSV (date,currency,rate) to convert values")
+    parser.add_argument("--store", default=None,
+                        help="SQLite history store to append to; the output is then pivoted from the whole store")
+    parser.add_argument("--incremental", action="store_true",
+                        help="with --store, only clean and append projects (by link) whose chart rows changed")
+    args = parser.parse_args()
+    if args.incremental and not args.store:
+        parser.error("--incremental needs --store (the store keeps the content hashes and the cleaned history)")
+
+    rates = load_rates(args.rates) if args.rates else None
+    raw = pd.read_csv(args.input)
+    if args.store:
+        with HistoryStore(args.store) as store:
+            if args.incremental:
+                hashes = link_hashes(raw)
+                changed = store.changed_links(hashes)
+                print(f"{len(changed)} of {len(hashes)} projects are new or changed.")
+                raw = raw[raw['link'].isin(changed)].reset_index(drop=True)
+            df = clean_history(raw, rates)
+            print(f"Appended {store.append(df)} points to {args.store}")
+            # Saved last, so an interrupted run reprocesses the same delta
+            if args.incremental:
+                store.save_hashes(hashes)
+            pivot_df = store.pivot()
+    else:
+        pivot_df = pivot_history(clean_history(raw, rates))
+    pivot_df.to_csv(args.output, index=False)
+    print(f"CSV file has been saved as '{args.output}'")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import numpy as np
+import pandas as pd
+
+# Currency every series is converted to
+target_currency = "Baht"
+
+# Rate used when no rate table is given (Baht per USD), as in time_convert.ipynb
+default_rates = {"USD": 34}
+
+# Chart months are labelled like "Dec 23"
+month_format = "%b %y"
+
+def load_rates(path):
+    """Dated rate table: one row per (date, currency) with the target units per unit.
+
+    Columns: date (YYYY-MM-DD), currency (e.g. USD), rate. A rate applies from its
+    date until the next one for the same currency.
+    """
+    rates = pd.read_csv(path, dtype={"currency": str})
+    rates["date"] = pd.to_datetime(rates["date"]).astype("datetime64[ns]")
+    rates["rate"] = rates["rate"].astype(float)
+    return rates[["date", "currency", "rate"]].sort_values("date").reset_index(drop=True)
+
+def constant_rates(rates):
+    """Rate table with one rate per currency valid for every date."""
+    return pd.DataFrame({
+        "date": pd.to_datetime([pd.Timestamp.min] * len(rates)).astype("datetime64[ns]"),
+        "currency": list(rates),
+        "rate": [float(rate) for rate in rates.values()]
+    })
+
+def detect_currency(formats):
+    """Currency prefix of each currencyStringFormat, e.g. "USD" for "USD%s/sqm"."""
+    return formats.str.extract(r"^([A-Za-z]+)", expand=False)
+
+def lookup_rates(currencies, dates, rates, target=target_currency):
+    """As-of rate for each (currency, date) pair; 1 for the target currency, NaN when unknown."""
+    query = pd.DataFrame({
+        "currency": np.asarray(currencies, dtype=object),
+        "date": pd.to_datetime(np.asarray(dates)).astype("datetime64[ns]"),
+        "position": np.arange(len(currencies))
+    })
+    result = np.full(len(query), np.nan)
+    known = query.dropna(subset=["currency", "date"]).sort_values("date")
+    if len(known) and len(rates):
+        matched = pd.merge_asof(known, rates, on="date", by="currency")
+        result[matched["position"].to_numpy()] = matched["rate"].to_numpy()
+    result[(query["currency"] == target).to_numpy()] = 1.0
+    return result
+
+def relabel(formats, converted, target=target_currency):
+    return formats.where(~converted, formats.str.replace(r"^[A-Za-z]+", target, regex=True))
+
+def report_unconverted(unconverted, currencies):
+    if unconverted.any():
+        missing = sorted(set(currencies[unconverted].dropna()))
+        print(f"No rate for {int(unconverted.sum())} rows (currencies: {missing}); left unconverted.")
+
+def normalize_long(df, rates, target=target_currency):
+    """Convert one-point-per-row history (value, date, currencyStringFormat) in place."""
+    currencies = detect_currency(df["currencyStringFormat"])
+    dates = pd.to_datetime(df["date"], format=month_format, errors="coerce")
+    rate = lookup_rates(currencies, dates, rates, target)
+
+    converted = pd.Series(~np.isnan(rate), index=df.index)
+    df["value"] = df["value"].where(~converted, df["value"] * rate)
+    df["currencyStringFormat"] = relabel(df["currencyStringFormat"], converted, target)
+    report_unconverted(~converted, currencies)
+    return df
+
+def month_columns(df):
+    dates = pd.to_datetime(pd.Series(df.columns.astype(str)), format=month_format, errors="coerce")
+    return [column for column, date in zip(df.columns, dates) if pd.notna(date)], dates.dropna()
+
+def normalize_wide(df, rates, target=target_currency):
+    """Convert pivoted history (one column per month) in place.
+
+    Rates are looked up once per (currency, month) and applied to the month
+    block as one array multiply. Rows missing a rate for a month they have a
+    value for stay in their original currency.
+    """
+    months, month_dates = month_columns(df)
+    currencies = detect_currency(df["currencyStringFormat"])
+    codes, unique_currencies = pd.factorize(currencies)
+
+    grid = lookup_rates(
+        np.repeat(unique_currencies.to_numpy(dtype=object), len(months)),
+        np.tile(month_dates.to_numpy(), len(unique_currencies)),
+        rates, target
+    ).reshape(len(unique_currencies), len(months))
+    # Rows without a currency get no rate
+    row_rates = np.vstack([grid, np.full((1, len(months)), np.nan)])[codes]
+
+    values = df[months].to_numpy(dtype=float, copy=True)
+    # Months without a value do not need a rate
+    converted = ~(np.isnan(row_rates) & ~np.isnan(values)).any(axis=1)
+    values[converted] *= row_rates[converted]
+    df[months] = values
+    converted = pd.Series(converted, index=df.index)
+    df["currencyStringFormat"] = relabel(df["currencyStringFormat"], converted, target)
+    report_unconverted(~converted, currencies)
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert pivoted Hipflat history to one currency.")
+    parser.add_argument("input", nargs="?", default="main_time_USD.csv")
+    parser.add_argument("output", nargs="?", default="main_historical_dataset.csv")
+    parser.add_argument("--rates", default=None, help="dated rate table CSV (date,currency,rate)")
+    args = parser.parse_args()
+
+    rates = load_rates(args.rates) if args.rates else constant_rates(default_rates)
+    df = normalize_wide(pd.read_csv(args.input), rates)
+    df.to_csv(args.output, index=False)
+    print(f"The DataFrame has been converted and saved to '{args.output}'")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import hashlib
+import sqlite3
+import pandas as pd
+
+# Chart months are labelled like "Dec 23"; the store keeps the first day of the month
+month_format = "%b %y"
+
+# Columns identifying one chart series
+series_columns = ["canvas_index", "currencyStringFormat", "link", "condo_name", "type"]
+
+schema = """
+CREATE TABLE IF NOT EXISTS history (
+    condo_name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    date TEXT NOT NULL,
+    link TEXT NOT NULL,
+    canvas_index INTEGER NOT NULL,
+    currencyStringFormat TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (condo_name, type, date, link, canvas_index, currencyStringFormat)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS history_link ON history (link);
+CREATE TABLE IF NOT EXISTS source_hashes (
+    link TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+def to_month_dates(labels):
+    """ISO dates (YYYY-MM-01) for month labels such as "Dec 23"; NaN for malformed labels."""
+    return pd.to_datetime(labels, format=month_format, errors="coerce").dt.strftime("%Y-%m-%d")
+
+def link_hashes(df):
+    """Content digest per link of raw chart rows: sha1 over the sorted per-row hashes,
+    so row order does not count as a change and digests are stable across runs."""
+    rows = pd.util.hash_pandas_object(df.astype(str), index=False)
+    return rows.groupby(df["link"].to_numpy(), sort=False).agg(
+        lambda values: hashlib.sha1(values.sort_values().to_numpy(dtype="<u8").tobytes()).hexdigest()
+    )
+
+def chronological(labels):
+    """Month labels sorted by date instead of alphabetically; malformed labels go last."""
+    labels = list(labels)
+    dates = pd.to_datetime(pd.Series(labels, dtype=object), format=month_format, errors="coerce")
+    order = sorted(range(len(labels)), key=lambda i: (pd.isna(dates[i]), dates[i] if pd.notna(dates[i]) else 0, str(labels[i])))
+    return [labels[i] for i in order]
+
+def pivot_series(df):
+    """One row per series with a column per month, months in chronological order.
+
+    Works for any set of months, so a newly crawled month is simply one more column.
+    """
+    pivot_df = df.pivot_table(index=series_columns, columns='date', values='value', aggfunc='first')
+    pivot_df.reset_index(inplace=True)
+    pivot_df.columns.name = None
+    months = chronological([column for column in pivot_df.columns if column not in series_columns])
+    pivot_df = pivot_df[series_columns + months]
+    return pivot_df.sort_values(by='condo_name').reset_index(drop=True)
+
+# Long-format Hipflat price history in SQLite: one row per chart point, keyed
+# and clustered by (condo_name, type, date), so monthly crawls are appended
+# (each crawled project's points replace its earlier ones) and range queries
+# read only the matching slice of the index.
+class HistoryStore:
+    def __init__(self, path="history.db"):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(schema)
+        self.connection.commit()
+
+    def append(self, df):
+        """Store labelled history rows (the clean_history output), replacing every earlier
+        point of the links in df, so a re-crawled project keeps no series that were
+        relabelled (e.g. Price to Rent) or months that disappeared.
+
+        Rows whose month label cannot be parsed are skipped and reported.
+        """
+        links = [(link,) for link in df["link"].dropna().unique()]
+        rows = df.dropna(subset=["condo_name", "type", "date", "link"])
+        dates = to_month_dates(rows["date"])
+        malformed = dates.isna()
+        if malformed.any():
+            labels = sorted(rows.loc[malformed, "date"].astype(str).unique())
+            print(f"Skipped {int(malformed.sum())} points with malformed month labels: {labels[:10]}")
+            rows, dates = rows[~malformed], dates[~malformed]
+        records = zip(
+            rows["condo_name"], rows["type"], dates, rows["link"],
+            rows["canvas_index"].astype(int), rows["currencyStringFormat"],
+            rows["value"].astype(float).where(rows["value"].notna(), None)
+        )
+        with self.connection:
+            self.connection.executemany("DELETE FROM history WHERE link = ?", links)
+            self.connection.executemany(
+                "INSERT INTO history VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT DO UPDATE SET value = excluded.value",
+                ((name, kind, date, link, int(index), currency, value)
+                 for name, kind, date, link, index, currency, value in records)
+            )
+        return len(rows)
+
+    def changed_links(self, hashes):
+        """Links of `hashes` (link -> digest) that are new or changed since save_hashes."""
+        saved = dict(self.connection.execute("SELECT link, hash FROM source_hashes"))
+        return {link for link, digest in hashes.items() if saved.get(link) != digest}
+
+    def save_hashes(self, hashes):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO source_hashes VALUES (?, ?)", hashes.items()
+            )
+
+    def query(self, condo_name=None, type=None, start=None, end=None):
+        """Points of one condo / series type between two dates (inclusive), dates typed."""
+        clauses = []
+        params = []
+        for column, value in (("condo_name", condo_name), ("type", type)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+        if end is not None:
+            clauses.append("date <= ?")
+            params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        df = pd.read_sql_query(
+            f"SELECT canvas_index, currencyStringFormat, date, value, link, condo_name, type "
+            f"FROM history{where} ORDER BY condo_name, type, date", self.connection, params=params
+        )
+        df["date"] = pd.to_datetime(df["date"])
+        return df
+
+    def pivot(self, condo_name=None, type=None, start=None, end=None):
+        """Wide table (one column per month label) built on demand from the long store."""
+        df = self.query(condo_name, type, start, end)
+        df["date"] = df["date"].dt.strftime(month_format)
+        return pivot_series(df)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
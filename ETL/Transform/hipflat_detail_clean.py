@@ -0,0 +1,115 @@
+import argparse
+import pandas as pd
+import hipflat_detail_features
+import incremental
+from hipflat_detail_features import extract_detail_features
+from stage_graph import Stage, StageGraph
+
+# Evolution columns and their cleaned names
+evolution_columns = {
+    "for_rent_evolution": "Rent percentage evolution compared to December 2023",
+    "for_sale_evolution": "Sale percentage evolution compared to December 2023"
+}
+
+# Regex pattern to extract the structured location
+location_pattern = r"^(.*?),?\s*(Soi\s.*?|.*?Rd\.|.*?Road|.*?),\s*(.*?),\s*(.*?),\s*Bangkok\s*(\d{5}),\s*THA$"
+
+location_components = ["Building/Place Name", "Soi/Road", "Sub-District", "District", "Postal Code"]
+
+def extract_percentage(value):
+    """Numeric value of an evolution string such as "+4.2% ..."."""
+    if isinstance(value, str):  # Check if the value is a string
+        return float(value.split("%")[0].replace("+", "").strip())
+    return None  # Return None for NaN or invalid values
+
+def load_prices(path):
+    return pd.read_csv(path)
+
+def detail_features(df):
+    # Every cell is scanned, as in the notebook; the evolution columns were
+    # numbers by the time the notebook scanned them, so they never matched
+    columns = [column for column in df.columns if column not in evolution_columns]
+    return extract_detail_features(df, columns=columns)
+
+def evolution_percentages(df):
+    return pd.DataFrame(
+        {name: df[column].apply(extract_percentage) for column, name in evolution_columns.items()},
+        index=df.index
+    )
+
+def location_parts(df):
+    """full_location and its components, from one vectorized regex match per row."""
+    groups = df["location"].astype(str).str.extract(location_pattern)
+    matched = groups[0].notna()
+
+    parts = pd.DataFrame(index=df.index)
+    parts["full_location"] = (
+        groups[0] + ", " + groups[1] + ", " + groups[2] + ", " + groups[3] +
+        ", Bangkok " + groups[4] + ", THA"
+    ).str.strip(", ").where(matched, None)
+    for position, name in enumerate(location_components):
+        group = groups[position]
+        # Empty groups are None, like the per-row version
+        parts[name] = group.str.strip(", ").where(group.fillna("") != "", None)
+    return parts
+
+def assemble(df, evolution, features, locations):
+    """The notebook's draf7 layout: original columns (evolution renamed in place),
+    then the detail features and the location columns."""
+    df = df.rename(columns=evolution_columns)
+    df[list(evolution.columns)] = evolution
+    return pd.concat([df, features, locations], axis=1)
+
+def clean_detail(df):
+    """All stages on an in-memory frame, without the stage cache (used for incremental deltas)."""
+    return assemble(df, evolution_percentages(df), detail_features(df), location_parts(df))
+
+def clean_incremental(input_path, output_path, state_path, chunksize=50000):
+    """Clean only the projects whose rows changed since the last run and upsert them
+    into output_path. Returns the number of cleaned rows written."""
+    hashes = incremental.file_hashes(input_path, chunksize=chunksize)
+    changed = incremental.changed_keys(hashes, incremental.load_state(state_path))
+    print(f"{len(changed)} of {len(hashes)} projects are new or changed.")
+
+    rows = 0
+    if changed:
+        chunks = [
+            chunk[chunk[incremental.key_column].isin(changed)]
+            for chunk in pd.read_csv(input_path, chunksize=chunksize)
+        ]
+        delta = clean_detail(pd.concat(chunks, ignore_index=True))
+        incremental.upsert_csv(output_path, delta, changed, chunksize=chunksize)
+        rows = len(delta)
+    # Saved last, so an interrupted run reprocesses the same delta
+    incremental.save_state(state_path, hashes)
+    return rows
+
+def build_graph(input_path, cache_dir=None):
+    return StageGraph([
+        Stage("load", load_prices, params={"path": input_path}, files=[input_path]),
+        Stage("features", detail_features, deps=["load"], modules=[hipflat_detail_features]),
+        Stage("evolution", evolution_percentages, deps=["load"]),
+        Stage("location", location_parts, deps=["load"]),
+        Stage("detail", assemble, deps=["load", "evolution", "features", "location"])
+    ], cache_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean Hipflat project details (step 2) with cached stages.")
+    parser.add_argument("input", nargs="?", default="converted_prices.csv")
+    parser.add_argument("output", nargs="?", default="draf7.csv")
+    parser.add_argument("--cache-dir", default=None, help="where stage outputs are cached (default: .stage_cache)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only clean new or changed projects (by link) and upsert them into the output")
+    parser.add_argument("--state", default=None, help="content hashes of the last run (default: <output>.hashes.csv)")
+    args = parser.parse_args()
+
+    if args.incremental:
+        rows = clean_incremental(args.input, args.output, args.state or args.output + ".hashes.csv")
+        print(f"Upserted {rows} cleaned rows into '{args.output}'")
+        return
+    df = build_graph(args.input, args.cache_dir).run("detail")
+    df.to_csv(args.output, index=False)
+    print(f"The DataFrame has been converted and saved to '{args.output}'")
+
+if __name__ == "__main__":
+    main()
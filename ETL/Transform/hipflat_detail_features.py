@@ -0,0 +1,102 @@
+import re
+import pandas as pd
+
+# Facilities flagged with a 0/1 column each
+facilities = [
+    "Gym", "Garden", "Security", "Sauna", "Children area", "Swimming pool",
+    "Library", "Jacuzzi", "Balcony", "Grill", "Parking", "Tennis court"
+]
+
+# List of pets-related phrases and their mapping (earlier entries win)
+pets_list = {
+    "Pets: All allowed All allowed": "Allowed all",
+    "Pets: Cats and dogs small Cats and dogs small": "Allowed small cats and dogs",
+    "Pets: Cats only Cats only": "Allowed cats only",
+    "Pets: Dogs only Dogs only": "Allowed dogs only",
+    "Pets: Cats and dogs any size Cats and dogs any size": "Allowed any size cats and dogs"
+}
+
+# Columns scanned by default: the scraped list items and the completion date
+text_column_prefixes = ("Features", "Management", "Parking and Lifts", "off_plan")
+
+# Joins the cells of a row; matches no pattern below, so no match spans two cells
+separator = "\x00"
+
+def literal_group(name, phrases):
+    return f"(?P<{name}>" + "|".join(re.escape(phrase) for phrase in phrases) + ")"
+
+# Every pattern in one alternation, wrapped in a lookahead so matches may overlap
+# (e.g. the facility "Parking" inside "Parking type: ..."). Scanning the joined row
+# once finds what the per-column re.search / substring checks found before.
+feature_pattern = re.compile(
+    "(?=(?:"
+    r"Common area management fee: ฿(?P<fee>\d+)/sqm"
+    r"|Common area management company: (?P<company>[\w\s-]+)"
+    r"|Sinking fund: ฿(?P<sinking_fund>\d+)/sqm"
+    r"|Ratio of parking spaces to # of units: (?P<parking_ratio>\d+)%"
+    r"|(?P<parking>Parking)(?: type: (?P<parking_type>[\w\s]+))?"
+    "|" + literal_group("pets", pets_list) +
+    "|" + literal_group("facility", [facility for facility in facilities if facility != "Parking"]) +
+    r"|(?i:(?P<date>(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[-\s](?:\d{2}|\d{4})))"
+    "))"
+)
+
+def text_columns(df):
+    return [column for column in df.columns if column.startswith(text_column_prefixes)]
+
+def completion_year(date_match):
+    # Convert 2-digit year to 4-digit (e.g. "95" becomes 1995)
+    year = re.search(r"\d{2,4}", date_match).group(0)
+    if len(year) == 2:
+        year = f"19{year}" if int(year) > 50 else f"20{year}"
+    return int(year)
+
+def scan_row(text):
+    found_facilities = set()
+    found_pets = set()
+    values = {}
+    for match in feature_pattern.finditer(text):
+        groups = {name: value for name, value in match.groupdict().items() if value is not None}
+        if "facility" in groups:
+            found_facilities.add(groups.pop("facility"))
+        if "parking" in groups:
+            found_facilities.add(groups.pop("parking"))
+        if "pets" in groups:
+            found_pets.add(groups.pop("pets"))
+        # Keep the first occurrence of every captured value
+        for name, value in groups.items():
+            values.setdefault(name, value)
+    return found_facilities, found_pets, values
+
+def extract_detail_features(df, columns=None):
+    """Facility flags, pets policy, fees, parking and completion date in one pass per row.
+
+    Scans the Features / Management / Parking and Lifts / off_plan columns by
+    default; pass columns=df.columns to scan every cell as the notebook did.
+    """
+    columns = text_columns(df) if columns is None else list(columns)
+    cells = df[columns].fillna("").astype(str).to_numpy()
+
+    rows = []
+    for row_cells in cells:
+        found_facilities, found_pets, values = scan_row(separator.join(row_cells))
+
+        row = {facility: int(facility in found_facilities) for facility in facilities}
+        row["Pets allowance"] = next(
+            (result for phrase, result in pets_list.items() if phrase in found_pets), "Not allowed"
+        )
+        row["Common area management fee in baht"] = int(values["fee"]) if "fee" in values else ""
+        row["Common area management company"] = values["company"].strip() if "company" in values else "Not provided"
+        row["Sinking fund per sqm"] = int(values["sinking_fund"]) if "sinking_fund" in values else ""
+        row["Ratio of parking spaces"] = int(values["parking_ratio"]) if "parking_ratio" in values else ""
+        row["Parking types"] = values["parking_type"].strip() if "parking_type" in values else "Not provided"
+        row["date the condo was completed"] = values.get("date")
+        row["year the condo was completed"] = completion_year(values["date"]) if "date" in values else None
+        rows.append(row)
+
+    return pd.DataFrame(rows, index=df.index)
+
+def add_detail_features(df, columns=None):
+    """Return df with the derived columns added (replacing any earlier ones)."""
+    features = extract_detail_features(df, columns)
+    return pd.concat([df.drop(columns=features.columns, errors="ignore"), features], axis=1)
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import pandas as pd
+
+# Key shared by every scraped dataset
+key_column = "link"
+
+def row_hashes(df, key=key_column):
+    """(key, hash) per row; every column is hashed as text so dtypes do not matter."""
+    values = df.astype(str)
+    hashes = pd.util.hash_pandas_object(values, index=False)
+    return pd.DataFrame({key: df[key].to_numpy(), "hash": hashes.to_numpy()})
+
+def combine_hashes(pairs, key=key_column):
+    """One hex digest per key; a key may span several rows (nearby places, chart points)."""
+    def digest(values):
+        # Sorted, so the row order inside a file does not count as a change; sha1
+        # (not hash()) so the digests saved in the state file stay valid across Python versions
+        ordered = values.sort_values().to_numpy(dtype="<u8")
+        return hashlib.sha1(ordered.tobytes()).hexdigest()
+    return pairs.groupby(key, sort=False)["hash"].agg(digest)
+
+def file_hashes(path, key=key_column, chunksize=50000):
+    """Content hash per key of a CSV, read in chunks."""
+    pairs = [
+        row_hashes(chunk, key)
+        for chunk in pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False)
+    ]
+    if not pairs:
+        return pd.Series(dtype=str)
+    return combine_hashes(pd.concat(pairs, ignore_index=True), key)
+
+def merge_hashes(*hashes):
+    """Join the per-key digests of several inputs (e.g. listings and their nearby places)."""
+    combined = pd.concat([digests.rename(i) for i, digests in enumerate(hashes)], axis=1).fillna("")
+    return combined.astype(str).agg(":".join, axis=1)
+
+def load_state(state_path):
+    if not os.path.exists(state_path):
+        return {}
+    state = pd.read_csv(state_path, dtype=str, keep_default_na=False)
+    return dict(zip(state[key_column], state["hash"]))
+
+def save_state(state_path, hashes):
+    temp_path = state_path + ".tmp"
+    pd.DataFrame({key_column: hashes.index, "hash": hashes.to_numpy()}).to_csv(temp_path, index=False)
+    os.replace(temp_path, state_path)
+
+def changed_keys(hashes, state):
+    """Keys that are new or whose content hash differs from the last run."""
+    return {key for key, digest in hashes.items() if state.get(key) != digest}
+
+def upsert_csv(output_path, delta, keys, key=key_column, chunksize=50000):
+    """Replace the rows of `keys` in output_path with the delta rows, streaming the old file.
+
+    Unchanged rows are copied through in chunks and the delta appended; the
+    result replaces the output in one os.replace, so a failed run leaves the
+    previous output intact. Keys in `keys` without delta rows are removed.
+    """
+    if not os.path.exists(output_path):
+        delta.to_csv(output_path, index=False)
+        return
+
+    header = list(pd.read_csv(output_path, nrows=0).columns)
+    columns = header + [column for column in delta.columns if column not in header]
+    temp_path = output_path + ".tmp"
+    pd.DataFrame(columns=columns).to_csv(temp_path, index=False)
+    for chunk in pd.read_csv(output_path, chunksize=chunksize, dtype=str, keep_default_na=False):
+        kept = chunk[~chunk[key].isin(keys)]
+        kept.reindex(columns=columns).to_csv(temp_path, mode="a", header=False, index=False)
+    delta.reindex(columns=columns).to_csv(temp_path, mode="a", header=False, index=False)
+    os.replace(temp_path, output_path)
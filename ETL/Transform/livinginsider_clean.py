@@ -0,0 +1,248 @@
+import argparse
+import random
+import numpy as np
+import pandas as pd
+import incremental
+
+# Columns cleaned into numbers; rows missing any of them are dropped
+numeric_columns = ["price", "price_per_space", "space", "floor", "bedroom", "bathroom"]
+
+# Read the raw text columns as strings so every chunk is cleaned the same way
+text_dtypes = {column: str for column in numeric_columns + ["click", "location"]}
+
+# Flag columns set to 1 when any nearby place of a listing contains one of the phrases
+keywords = {
+    "BTS": "bts",
+    "Airport Link": "airport link",
+    "Hospital": "hospital",
+    "Education place": ["college", "institute", "university"],
+    "Lotus": "lotus",
+    "Suvarnabhumi Airport": "suvarnabhumi airport",
+    "Robinson": "robinson",
+    "Big C": "big c",
+    "Makro": "makro",
+    "Don Mueang International Airport": "don mueang international airport",
+    "MRT": "mrt",
+    "Mall": ["central", "mall", "plaza"]
+}
+
+# Nearest place kept per category (Nearest_<category>_name / _distance)
+nearest_categories = {
+    "Train_station": ["bts", "mrt", "airport link"],
+    "Education_place": ["college", "institute", "university"],
+    "Hospital": ["hospital"],
+    "Airport": ["suvarnabhumi airport", "don mueang international airport"]
+}
+
+# Categories that also get a Nearest_<category>_type column, from the first phrase found
+nearest_types = {
+    "Train_station": {"bts": "BTS", "mrt": "MRT", "airport link": "Airport Link"},
+    "Airport": {
+        "suvarnabhumi airport": "Suvarnabhumi Airport",
+        "don mueang international airport": "Don Mueang International Airport"
+    }
+}
+
+# Output columns once the nearby features are joined
+final_columns = [
+    "link", "post_title", "condo_name", "detail location", "price", "price_per_space", "space",
+    "floor", "bedroom", "bathroom", "click", "Page", "Zone", "District",
+    "BTS", "MRT", "Airport Link", "Hospital", "Education place", "Mall",
+    "Lotus", "Robinson", "Big C", "Makro", "Don Mueang International Airport", "Suvarnabhumi Airport",
+    "Nearest_Train_station_name", "Nearest_Train_station_type", "Nearest_Train_station_distance",
+    "Nearest_Education_place_name", "Nearest_Education_place_distance",
+    "Nearest_Hospital_name", "Nearest_Hospital_distance",
+    "Nearest_Airport_name", "Nearest_Airport_type", "Nearest_Airport_distance"
+]
+
+def convert_clicks(clicks):
+    """Convert "K" and "M" suffixed click counts to numbers."""
+    if isinstance(clicks, str):
+        if 'K' in clicks.upper():
+            return float(clicks.upper().replace('K', '')) * 1000
+        elif 'M' in clicks.upper():
+            return float(clicks.upper().replace('M', '')) * 1000000
+    return clicks
+
+def load_zones(zones_path):
+    zones_districts_df = pd.read_csv(zones_path)
+    return dict(zip(zones_districts_df["Zone"], zones_districts_df["District"]))
+
+def clean_values(df):
+    df["price"] = pd.to_numeric(df["price"].str.replace(r"[^\d]", "", regex=True), errors='coerce')
+    df["price_per_space"] = pd.to_numeric(df["price_per_space"].str.replace(r"[^\d]", "", regex=True), errors='coerce')
+    df["space"] = pd.to_numeric(df["space"].str.replace(r"Sq.m.", "", regex=True).str.strip(), errors='coerce')
+    df["floor"] = pd.to_numeric(df["floor"].str.extract(r"(\d+)")[0], errors='coerce')
+    df["bedroom"] = pd.to_numeric(df["bedroom"].str.replace(r"[^\d]", "", regex=True), errors='coerce')
+    df["bathroom"] = pd.to_numeric(df["bathroom"].str.replace(r"[^\d]", "", regex=True), errors='coerce')
+    df["click"] = df["click"].apply(convert_clicks)
+
+    # Drop rows with NaN values
+    df = df.dropna(subset=numeric_columns)
+    return df.rename(columns={"location": "detail location"})
+
+def assign_zones(df, zones_districts, rng):
+    """Zone/District from the first zone named in the location, else a random location part."""
+    locations = df["detail location"].fillna("")
+    lowered = locations.str.lower()
+    zone_names = list(zones_districts)
+
+    zone = np.full(len(df), None, dtype=object)
+    district = np.full(len(df), None, dtype=object)
+    matched = np.zeros(len(df), dtype=bool)
+    if zone_names and len(df):
+        # rows x zones hit matrix; argmax picks the first zone in mapping order
+        hits = np.column_stack([lowered.str.contains(name.lower(), regex=False).to_numpy() for name in zone_names])
+        matched = hits.any(axis=1)
+        first = hits.argmax(axis=1)
+        zone[matched] = np.array(zone_names, dtype=object)[first[matched]]
+        district[matched] = np.array([zones_districts[name] for name in zone_names], dtype=object)[first[matched]]
+
+    for position in np.flatnonzero(~matched):
+        parts = [part.strip() for part in locations.iloc[position].split(",")]
+        zone[position] = rng.choice(parts)
+        district[position] = rng.choice(parts)
+
+    df["Zone"] = zone
+    df["District"] = district
+    return df
+
+def parse_distance_m(distances):
+    """Distance strings such as "1.2 Km." or "350 m." in meters (NaN when unreadable)."""
+    parts = distances.astype(str).str.extract(r"^\s*([\d.]+)\s*(?i:(km|m))?\.?\s*$")
+    value = pd.to_numeric(parts[0], errors='coerce')
+    return value.where(parts[1].str.lower() == "m", value * 1000)
+
+def load_nearby(nearby_path):
+    nearby_df = pd.read_csv(nearby_path, dtype={"NearBy": str, "Distance": str})
+    nearby_df["NearBy"] = nearby_df["NearBy"].fillna("").str.lower()
+    nearby_df["distance_m"] = parse_distance_m(nearby_df["Distance"])
+
+    # Handle NaN values in Distance
+    nearby_df = nearby_df.dropna(subset=["distance_m"])
+    # Reported in km, as before
+    nearby_df["Distance"] = nearby_df["distance_m"] / 1000
+    return nearby_df.reset_index(drop=True)
+
+def contains_any(names, phrases):
+    hit = np.zeros(len(names), dtype=bool)
+    for phrase in phrases:
+        hit |= names.str.contains(phrase, regex=False).to_numpy()
+    return hit
+
+def nearby_features(nearby_df):
+    """Keyword flags and nearest places per link, built with one groupby per column.
+
+    Each place name is classified once per phrase; the nearest place of a
+    category is the groupby-link idxmin over the matching places, so ties keep
+    the first place listed, as the per-listing loop did.
+    """
+    names = nearby_df["NearBy"]
+    links = nearby_df["link"]
+    features = pd.DataFrame(index=pd.Index(links.unique(), name="link"))
+
+    for key, values in keywords.items():
+        phrases = values if isinstance(values, list) else [values]
+        features[key] = pd.Series(contains_any(names, phrases)).groupby(links).any().astype(int)
+
+    for category, phrases in nearest_categories.items():
+        candidates = nearby_df[contains_any(names, phrases)]
+        nearest = candidates.loc[candidates.groupby("link", sort=False)["distance_m"].idxmin()].set_index("link")
+        features[f"Nearest_{category}_name"] = nearest["NearBy"]
+        if category in nearest_types:
+            labels = nearest_types[category]
+            features[f"Nearest_{category}_type"] = pd.Series(np.select(
+                [nearest["NearBy"].str.contains(phrase, regex=False) for phrase in labels],
+                list(labels.values()), default=""
+            ), index=nearest.index)
+        features[f"Nearest_{category}_distance"] = nearest["Distance"]
+
+    return features
+
+def add_nearby_features(df, features):
+    """Left-join the per-link nearby features; listings without nearby places get 0 / ""."""
+    df = df.merge(features, left_on="link", right_index=True, how="left")
+    flags = list(keywords)
+    df[flags] = df[flags].fillna(0).astype(int)
+    nearest_columns = [column for column in features.columns if column not in keywords]
+    df[nearest_columns] = df[nearest_columns].astype(object).fillna("")
+    return df
+
+def clean_chunk(df, zones_districts, rng, features=None):
+    df = assign_zones(clean_values(df), zones_districts, rng)
+    if features is not None:
+        df = add_nearby_features(df, features)[final_columns]
+    return df
+
+def iter_cleaned(input_path, zones_path, chunksize=50000, seed=None, nearby_path=None, links=None):
+    """Yield cleaned chunks of the listing dump; memory is bounded by chunksize.
+
+    With nearby_path, the nearby features are computed once per link and joined
+    into every chunk, giving the final_columns layout. With links, only those
+    listings are cleaned.
+    """
+    zones_districts = load_zones(zones_path)
+    rng = random.Random(seed)
+    features = nearby_features(load_nearby(nearby_path)) if nearby_path else None
+    for chunk in pd.read_csv(input_path, chunksize=chunksize, dtype=text_dtypes):
+        if links is not None:
+            chunk = chunk[chunk["link"].isin(links)]
+        yield clean_chunk(chunk, zones_districts, rng, features)
+
+def write_chunks(chunks, output_path):
+    rows = 0
+    header = True
+    for chunk in chunks:
+        chunk.to_csv(output_path, mode="w" if header else "a", header=header, index=False)
+        header = False
+        rows += len(chunk)
+    if header:
+        print("No rows to save.")
+    return rows
+
+def clean_incremental(input_path, output_path, zones_path, state_path,
+                      chunksize=50000, seed=None, nearby_path=None):
+    """Clean only the listings whose raw rows (or nearby places) changed since the last run
+    and upsert them into output_path. Returns the number of cleaned rows written."""
+    hashes = incremental.file_hashes(input_path, chunksize=chunksize)
+    if nearby_path:
+        # Listings are the keys; nearby places only count for listings in the input
+        nearby_hashes = incremental.file_hashes(nearby_path, chunksize=chunksize)
+        hashes = incremental.merge_hashes(hashes, nearby_hashes).reindex(hashes.index)
+    changed = incremental.changed_keys(hashes, incremental.load_state(state_path))
+    print(f"{len(changed)} of {len(hashes)} listings are new or changed.")
+
+    rows = 0
+    if changed:
+        chunks = list(iter_cleaned(input_path, zones_path, chunksize, seed, nearby_path, changed))
+        delta = pd.concat(chunks, ignore_index=True)
+        incremental.upsert_csv(output_path, delta, changed, chunksize=chunksize)
+        rows = len(delta)
+    # Saved last, so an interrupted run reprocesses the same delta
+    incremental.save_state(state_path, hashes)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean the livinginsider listing dump in fixed-size chunks.")
+    parser.add_argument("input", nargs="?", default="unclean.csv")
+    parser.add_argument("output", nargs="?", default="cleaned_data.csv")
+    parser.add_argument("--zones", default="zones_districts.csv", help="CSV with Zone and District columns")
+    parser.add_argument("--chunksize", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=None, help="seed for the random Zone/District fallback")
+    parser.add_argument("--nearby", default=None, help="nearby.csv to add the keyword flags and Nearest_* columns")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only clean new or changed listings and upsert them into the output")
+    parser.add_argument("--state", default=None, help="content hashes of the last run (default: <output>.hashes.csv)")
+    args = parser.parse_args()
+
+    if args.incremental:
+        state_path = args.state or args.output + ".hashes.csv"
+        rows = clean_incremental(args.input, args.output, args.zones, state_path,
+                                 args.chunksize, args.seed, args.nearby)
+    else:
+        chunks = iter_cleaned(args.input, args.zones, args.chunksize, args.seed, args.nearby)
+        rows = write_chunks(chunks, args.output)
+    print(f"Saved {rows} cleaned rows to {args.output}")
+
+if __name__ == "__main__":
+    main()
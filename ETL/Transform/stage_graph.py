@@ -0,0 +1,99 @@
+import hashlib
+import inspect
+import os
+import re
+import pandas as pd
+
+# Cached stage outputs: <cache_dir>/<stage>-<key>.pkl, key = 16 hex digits
+default_cache_dir = ".stage_cache"
+key_length = 16
+
+def file_fingerprint(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, mode='rb') as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# One named step of a transform. func receives the outputs of deps (in order)
+# followed by params as keyword arguments, and returns a DataFrame without
+# modifying its inputs. The code part of the key is the source of the module
+# defining func plus the helper modules listed in modules, so editing any of
+# them invalidates the stage; bump version for changes outside those files.
+class Stage:
+    def __init__(self, name, func, deps=(), version=1, params=None, files=(), modules=()):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.version = version
+        self.params = dict(params or {})
+        self.files = list(files)
+        self.modules = list(modules)
+
+    def code_fingerprint(self):
+        digest = hashlib.sha256(str(self.version).encode())
+        digest.update(getattr(self.func, "__qualname__", repr(self.func)).encode())
+        for module in [inspect.getmodule(self.func)] + self.modules:
+            try:
+                source = inspect.getsource(module)
+            except (OSError, TypeError):
+                # No source available (e.g. builtins); only version covers it
+                source = repr(module)
+            digest.update(source.encode())
+        return digest.hexdigest()
+
+# Runs stages in dependency order with an on-disk cache. A stage's key covers its
+# code, params, input files and the keys of its deps, so changing one stage only
+# recomputes it and its descendants.
+class StageGraph:
+    def __init__(self, stages, cache_dir=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir
+        self.keys = {}
+        self.results = {}
+
+    def key(self, name):
+        if name not in self.keys:
+            stage = self.stages[name]
+            digest = hashlib.sha256()
+            digest.update(name.encode())
+            digest.update(stage.code_fingerprint().encode())
+            digest.update(repr(sorted(stage.params.items())).encode())
+            for path in stage.files:
+                digest.update(file_fingerprint(path).encode())
+            for dep in stage.deps:
+                digest.update(self.key(dep).encode())
+            self.keys[name] = digest.hexdigest()[:key_length]
+        return self.keys[name]
+
+    def cache_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}-{self.key(name)}.pkl")
+
+    def run(self, name):
+        if name in self.results:
+            return self.results[name]
+        stage = self.stages[name]
+        path = self.cache_path(name)
+        if os.path.exists(path):
+            print(f"Stage '{name}': loaded from cache")
+            result = pd.read_pickle(path)
+        else:
+            inputs = [self.run(dep) for dep in stage.deps]
+            print(f"Stage '{name}': computing")
+            result = stage.func(*inputs, **stage.params)
+            self.store(name, result)
+        self.results[name] = result
+        return result
+
+    def store(self, name, result):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.cache_path(name)
+        temp_path = path + ".tmp"
+        result.to_pickle(temp_path)
+        os.replace(temp_path, path)
+        # Older versions of this stage can no longer be hit; match the exact
+        # "<name>-<key>.pkl" shape so e.g. "load" leaves "load-extra" alone
+        stale_pattern = re.compile(re.escape(name) + f"-[0-9a-f]{{{key_length}}}\\.pkl")
+        for stale in os.listdir(self.cache_dir):
+            if stale_pattern.fullmatch(stale) and os.path.join(self.cache_dir, stale) != path:
+                os.remove(os.path.join(self.cache_dir, stale))